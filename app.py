@@ -1,10 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from flask import Flask, render_template, request, jsonify
 import sqlite3
 import database
 from modules import news_fetcher, web_scraper, ai_analyst, market_fetcher
 from modules.sentiment_aggregator import aggregate_ticker_sentiment, get_market_sentiment_summary
 from modules.signal_generator import generate_signal, get_actionable_signals
-from modules.market_analyzer import analyze_market, get_market_context, MarketAnalyzer
+from modules.market_analyzer import (
+    analyze_market, get_market_context, invalidate_market_context, MarketAnalyzer
+)
 from modules.economic_health import (
     get_economic_health, get_economic_health_history, refresh_economic_data
 )
@@ -15,6 +19,10 @@ from config import FRED_INDICATORS, CATEGORY_WEIGHTS
 
 app = Flask(__name__)
 
+# Articles analyzed per scan, and how many are scraped/analyzed at once
+SCAN_ANALYSIS_LIMIT = 10
+SCAN_WORKERS = 4
+
 with app.app_context():
     database.init_db()
 
@@ -72,6 +80,33 @@ def toggle_save(news_id):
     # Iconița se schimbă în funcție de new_status
     return render_template('save_button.html', is_saved=new_status, news_id=news_id)
 
+def _scrape_and_analyze(item):
+    """Scrape one unprocessed article and run the AI analysis on it.
+    Returns an update_news_analysis_batch row, or None on failure."""
+    print(f"   ⚙️ Processing: {item['title']}...")
+    content = web_scraper.get_article_content(item['url'])
+
+    if not content:
+        print("   ⚠️ Could not extract content. Skipping.")
+        return None
+
+    ai_result = ai_analyst.analyze_article(content)
+    if not ai_result:
+        return None
+
+    return (
+        item['url'],
+        content,
+        ai_result.get('summary'),
+        ai_result.get('impact_score'),
+        ai_result.get('is_important'),
+        ai_result.get('tickers'),
+        ai_result.get('sector'),
+        ai_result.get('direction'),
+        ai_result.get('confidence'),
+        ai_result.get('catalysts')
+    )
+
 @app.route('/scan-news', methods=['POST'])
 def scan_news():
     """HTMX endpoint - returns news cards HTML."""
@@ -82,33 +117,19 @@ def scan_news():
 
     unprocessed = database.get_unprocessed_news()
 
-    count = 0
-    for item in unprocessed:
-        if count >= 10:
-            break
-
-        print(f"   ⚙️ Processing: {item['title']}...")
-        content = web_scraper.get_article_content(item['url'])
-
-        if content:
-            ai_result = ai_analyst.analyze_article(content)
-
-            if ai_result:
-                database.update_news_analysis(
-                    item['url'],
-                    content,
-                    ai_result.get('summary'),
-                    ai_result.get('impact_score'),
-                    ai_result.get('is_important'),
-                    tickers=ai_result.get('tickers'),
-                    sector=ai_result.get('sector'),
-                    direction=ai_result.get('direction'),
-                    confidence=ai_result.get('confidence'),
-                    catalysts=ai_result.get('catalysts')
-                )
-                count += 1
-        else:
-            print("   ⚠️ Could not extract content. Skipping.")
+    # Scrape + analyze in waves sized to the articles still needed, so the
+    # network and Ollama round trips overlap without overshooting the limit
+    analyzed = []
+    pending = iter(unprocessed)
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as pool:
+        while len(analyzed) < SCAN_ANALYSIS_LIMIT:
+            wave = list(islice(pending, SCAN_ANALYSIS_LIMIT - len(analyzed)))
+            if not wave:
+                break
+            analyzed.extend(row for row in pool.map(_scrape_and_analyze, wave) if row)
+
+    # One write transaction for the whole scan
+    database.update_news_analysis_batch(analyzed)
 
     all_news = database.get_news_with_signals()
 
@@ -382,6 +403,7 @@ def refresh_economic():
         backfill = request.args.get('backfill', 'false').lower() == 'true'
         print(f"[REFRESH] Starting FRED data refresh (backfill={backfill})...")
         result = refresh_economic_data(backfill=backfill)
+        invalidate_market_context()  # cached context embeds the old economic health
 
         if result and result.get('health'):
             health = result['health']
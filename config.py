@@ -1,4 +1,5 @@
 import os
+from dataclasses import dataclass
 from dotenv import load_dotenv
 
 # 1. Încărcăm variabilele din fișierul .env în memoria calculatorului
@@ -19,6 +20,16 @@ OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gpt-oss:120b-cloud")
 # Cheia: Dacă serverul cloud are parolă, o luăm de aici
 OLLAMA_KEY = os.getenv("OLLAMA_KEY")
 
+# Cât timp ține serverul modelul încărcat în memorie între două articole
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Sectoarele GICS în care AI-ul clasifică știrile (folosite și de database)
+GICS_SECTORS = (
+    "Technology", "Healthcare", "Financials", "Consumer Discretionary",
+    "Consumer Staples", "Energy", "Materials", "Industrials",
+    "Utilities", "Real Estate", "Communication Services"
+)
+
 # ==========================================
 # CONFIGURĂRI PENTRU ȘTIRI (FINNHUB & RSS)
 # ==========================================
@@ -134,6 +145,44 @@ FRED_INDICATORS = {
     'SP500': {'name': 'S&P 500', 'category': 'financial', 'frequency': 'daily', 'direction': 'higher_better'},
 }
 
+
+# Earliest gap (days) between an indicator's latest observation date and the release
+# of the next one. FRED dates monthly/quarterly series at the start of the period, so
+# the next value cannot appear until two periods later; weekly/daily are end-dated.
+FREQUENCY_CADENCE_DAYS = {
+    'daily': 1,
+    'weekly': 7,
+    'monthly': 59,     # shortest two-month span (Feb + Mar)
+    'quarterly': 181,  # shortest two-quarter span (Q1 + Q2)
+}
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    """Flattened, read-only view of one FRED_INDICATORS entry."""
+    name: str
+    category: str
+    frequency: str
+    direction: str
+    cadence_days: int = 1
+    optimal_low: float = 0
+    optimal_high: float = 100
+
+
+# Built once at import so hot paths use attribute access instead of dict.get chains
+FRED_INDICATOR_SPECS = {
+    series_id: IndicatorSpec(
+        name=cfg['name'],
+        category=cfg['category'],
+        frequency=cfg['frequency'],
+        direction=cfg.get('direction', 'context'),
+        cadence_days=FREQUENCY_CADENCE_DAYS.get(cfg['frequency'], 1),
+        optimal_low=cfg.get('optimal', (0, 100))[0],
+        optimal_high=cfg.get('optimal', (0, 100))[1],
+    )
+    for series_id, cfg in FRED_INDICATORS.items()
+}
+
 # Category weights for composite Economic Health Index
 CATEGORY_WEIGHTS = {
     'growth': 0.20,      # GDP, Industrial Production, Capacity
@@ -1,18 +1,25 @@
 import sqlite3
 import json
 import math
+from dataclasses import dataclass
 from datetime import datetime
 
+import numpy as np
+
 DB_NAME = "news_intelligence.db"
 
-GICS_SECTORS = [
-    "Technology", "Healthcare", "Financials", "Consumer Discretionary",
-    "Consumer Staples", "Energy", "Materials", "Industrials",
-    "Utilities", "Real Estate", "Communication Services"
-]
+# Shared by the single and batched placeholder writers, so sqlite3's
+# per-connection statement cache sees one SQL text
+INSERT_NEWS_SQL = '''
+    INSERT OR IGNORE INTO news (source, title, url, published_at)
+    VALUES (?, ?, ?, ?)
+'''
 
 def init_db():
     with sqlite3.connect(DB_NAME) as conn:
+        # WAL is persistent on the file: readers no longer block the scan writer
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
         c = conn.cursor()
         c.execute('''
             CREATE TABLE IF NOT EXISTS news (
@@ -154,6 +161,7 @@ def init_db():
         _migrate_add_market_indices_table(conn)
         _migrate_add_sentiment_columns(conn)
         _migrate_add_fred_tables(conn)
+        _migrate_add_news_state_table(conn)
     print("[OK] Database initialized!")
 
 def _migrate_add_quant_columns(conn):
@@ -215,6 +223,30 @@ def _migrate_add_sentiment_columns(conn):
     conn.commit()
 
 
+def _migrate_add_news_state_table(conn):
+    """Add per-source sync state for incremental news fetches (backwards compatible)."""
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS news_state (
+            source TEXT PRIMARY KEY,
+            last_id INTEGER
+        )
+    ''')
+    # HTTP validators and newest seen entry date per RSS feed
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS feed_state (
+            source TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            last_published TEXT
+        )
+    ''')
+    c.execute("PRAGMA table_info(feed_state)")
+    if 'last_published' not in [col[1] for col in c.fetchall()]:
+        c.execute("ALTER TABLE feed_state ADD COLUMN last_published TEXT")
+    conn.commit()
+
+
 def _migrate_add_fred_tables(conn):
     """Add FRED economic indicator tables (backwards compatible)."""
     c = conn.cursor()
@@ -276,16 +308,92 @@ def add_news_placeholder(source, title, url, published_at):
     try:
         with sqlite3.connect(DB_NAME) as conn:
             c = conn.cursor()
-            c.execute('''
-                INSERT OR IGNORE INTO news (source, title, url, published_at)
-                VALUES (?, ?, ?, ?)
-            ''', (source, title, url, published_at))
+            c.execute(INSERT_NEWS_SQL, (source, title, url, published_at))
             conn.commit()
             return c.lastrowid
     except Exception as e:
         print(f"Eroare DB: {e}")
         return None
 
+def add_news_placeholders(rows):
+    """
+    Inserează mai multe știri într-o singură tranzacție.
+    rows: listă de (source, title, url, published_at).
+    Întoarce {sursă: câte știri noi}, duplicatele (același url) fiind ignorate,
+    sau None dacă tranzacția a eșuat și nu s-a salvat nimic.
+    """
+    by_source = {}
+    for row in rows:
+        by_source.setdefault(row[0], []).append(row)
+
+    counts = {}
+    try:
+        with sqlite3.connect(DB_NAME) as conn:
+            c = conn.cursor()
+            for source, source_rows in by_source.items():
+                c.executemany(INSERT_NEWS_SQL, source_rows)
+                # La executemany, rowcount = numărul total de rânduri inserate
+                counts[source] = max(c.rowcount, 0)
+            conn.commit()
+    except Exception as e:
+        print(f"Eroare DB: {e}")
+        return None
+    return counts
+
+def get_news_last_id(source):
+    """Ultimul id extern văzut pentru o sursă (ex. 'finnhub'), sau None."""
+    with sqlite3.connect(DB_NAME) as conn:
+        row = conn.execute("SELECT last_id FROM news_state WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else None
+
+def set_news_last_id(source, last_id):
+    """Memorează ultimul id extern procesat pentru o sursă."""
+    with sqlite3.connect(DB_NAME) as conn:
+        conn.execute('''
+            INSERT INTO news_state (source, last_id) VALUES (?, ?)
+            ON CONFLICT(source) DO UPDATE SET last_id = MAX(last_id, excluded.last_id)
+        ''', (source, last_id))
+        conn.commit()
+
+def get_feed_states():
+    """{sursă: (etag, last_modified)} pentru fluxurile RSS descărcate anterior."""
+    with sqlite3.connect(DB_NAME) as conn:
+        rows = conn.execute("SELECT source, etag, last_modified FROM feed_state").fetchall()
+    return {source: (etag, last_modified) for source, etag, last_modified in rows}
+
+def save_feed_states(states):
+    """Salvează validatorii HTTP; states: listă de (source, etag, last_modified)."""
+    if not states:
+        return
+    with sqlite3.connect(DB_NAME) as conn:
+        conn.executemany('''
+            INSERT INTO feed_state (source, etag, last_modified) VALUES (?, ?, ?)
+            ON CONFLICT(source) DO UPDATE SET
+                etag = excluded.etag,
+                last_modified = excluded.last_modified
+        ''', states)
+        conn.commit()
+
+def get_feed_last_published():
+    """{sursă: data celei mai noi știri RSS văzute ('%Y-%m-%d %H:%M:%S')}."""
+    with sqlite3.connect(DB_NAME) as conn:
+        rows = conn.execute(
+            "SELECT source, last_published FROM feed_state WHERE last_published IS NOT NULL"
+        ).fetchall()
+    return dict(rows)
+
+def save_feed_last_published(stamps):
+    """Salvează data celei mai noi știri văzute; stamps: listă de (source, last_published)."""
+    if not stamps:
+        return
+    with sqlite3.connect(DB_NAME) as conn:
+        conn.executemany('''
+            INSERT INTO feed_state (source, last_published) VALUES (?, ?)
+            ON CONFLICT(source) DO UPDATE SET
+                last_published = MAX(COALESCE(last_published, ''), excluded.last_published)
+        ''', stamps)
+        conn.commit()
+
 def get_unprocessed_news():
     with sqlite3.connect(DB_NAME) as conn:
         conn.row_factory = sqlite3.Row 
@@ -309,13 +417,48 @@ def update_news_analysis(url, content, summary, score, is_important,
               tickers_json, sector, direction, confidence, catalysts_json, url))
         conn.commit()
 
-def calculate_time_decay_score(impact_score, created_at_str):
-    """Calculate time-decay weighted score. Half-life ~7 hours (λ=0.1)."""
+def update_news_analysis_batch(rows):
+    """
+    Store several AI analyses in one transaction.
+    rows: iterable of (url, content, summary, score, is_important,
+    tickers, sector, direction, confidence, catalysts), same order as
+    update_news_analysis. Like update_news_analysis it only touches rows
+    that still exist, so news deleted mid-scan (e.g. /reset-db) stays gone.
+    Returns the number of rows updated.
+    """
+    params = [
+        (content, summary, score, is_important,
+         json.dumps(tickers) if tickers else None, sector, direction, confidence,
+         json.dumps(catalysts) if catalysts else None, url)
+        for (url, content, summary, score, is_important,
+             tickers, sector, direction, confidence, catalysts) in rows
+    ]
+    if not params:
+        return 0
+
+    with sqlite3.connect(DB_NAME) as conn:
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("BEGIN IMMEDIATE")
+        c = conn.cursor()
+        c.executemany('''
+            UPDATE news
+            SET full_content = ?, ai_summary = ?, impact_score = ?, is_important = ?,
+                tickers = ?, sector = ?, direction = ?, confidence = ?, catalysts = ?
+            WHERE url = ?
+        ''', params)
+        conn.commit()
+        return c.rowcount
+
+def calculate_time_decay_score(impact_score, created_at_str, now=None):
+    """
+    Calculate time-decay weighted score. Half-life ~7 hours (λ=0.1).
+    Pass `now` when scoring many rows so they share one reference time.
+    """
     if not impact_score or not created_at_str:
         return impact_score or 0
     try:
         created_at = datetime.strptime(created_at_str, '%Y-%m-%d %H:%M:%S')
-        hours_old = (datetime.now() - created_at).total_seconds() / 3600
+        hours_old = ((now or datetime.now()) - created_at).total_seconds() / 3600
         decay_factor = math.exp(-0.1 * hours_old)
         return round(impact_score * decay_factor, 2)
     except:
@@ -346,6 +489,7 @@ def get_news_with_signals(only_saved=False, sector_filter=None, direction_filter
         c.execute(query, params)
 
         results = []
+        now = datetime.now()
         for row in c.fetchall():
             item = dict(row)
             if item.get('tickers'):
@@ -353,7 +497,7 @@ def get_news_with_signals(only_saved=False, sector_filter=None, direction_filter
             if item.get('catalysts'):
                 item['catalysts'] = json.loads(item['catalysts'])
             item['weighted_score'] = calculate_time_decay_score(
-                item.get('impact_score'), item.get('created_at')
+                item.get('impact_score'), item.get('created_at'), now
             )
             item['high_conviction'] = (
                 (item.get('confidence') or 0) >= 0.8 and
@@ -453,18 +597,23 @@ MARKET_INDICES = {
 
 def save_market_data(symbol, data_rows):
     """Bulk insert/update market data. data_rows is list of dicts with date, open, high, low, close, volume."""
+    return save_market_data_rows(symbol, [
+        (row['date'], row['open'], row['high'], row['low'], row['close'], row['volume'], row.get('pct_change'))
+        for row in data_rows
+    ])
+
+def save_market_data_rows(symbol, rows):
+    """Bulk insert/update market data from (date, open, high, low, close, volume, pct_change) tuples."""
     with sqlite3.connect(DB_NAME) as conn:
-        c = conn.cursor()
-        for row in data_rows:
-            c.execute('''
-                INSERT OR REPLACE INTO market_indices (symbol, date, open, high, low, close, volume, pct_change)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (symbol, row['date'], row['open'], row['high'], row['low'], row['close'], row['volume'], row.get('pct_change')))
+        conn.executemany('''
+            INSERT OR REPLACE INTO market_indices (symbol, date, open, high, low, close, volume, pct_change)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(symbol, *row) for row in rows])
         conn.commit()
-    return len(data_rows)
+    return len(rows)
 
 def get_market_data(symbol, start_date=None, end_date=None):
-    """Get market data for a symbol with optional date range."""
+    """Get market data for a symbol with optional date range, ordered by date ASC (callers rely on this)."""
     with sqlite3.connect(DB_NAME) as conn:
         conn.row_factory = sqlite3.Row
         c = conn.cursor()
@@ -483,6 +632,48 @@ def get_market_data(symbol, start_date=None, end_date=None):
         c.execute(query, params)
         return [dict(row) for row in c.fetchall()]
 
+@dataclass(frozen=True)
+class OHLCVColumns:
+    """Market data for one symbol as columns (one array per field), ordered by date."""
+    date: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self):
+        return len(self.date)
+
+def get_market_data_columns(symbol, start_date=None, end_date=None):
+    """Like get_market_data, but column-oriented; NULL prices become NaN."""
+    with sqlite3.connect(DB_NAME) as conn:
+        c = conn.cursor()
+
+        query = "SELECT date, open, high, low, close, volume FROM market_indices WHERE symbol = ?"
+        params = [symbol]
+
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date)
+
+        query += " ORDER BY date ASC"
+        c.execute(query, params)
+        rows = c.fetchall()
+
+    columns = list(zip(*rows)) if rows else [()] * 6
+    return OHLCVColumns(
+        date=np.array(columns[0], dtype=str),
+        open=np.array(columns[1], dtype=np.float64),
+        high=np.array(columns[2], dtype=np.float64),
+        low=np.array(columns[3], dtype=np.float64),
+        close=np.array(columns[4], dtype=np.float64),
+        volume=np.array(columns[5], dtype=np.float64)
+    )
+
 def get_latest_market_date(symbol):
     """Get the most recent date we have data for."""
     with sqlite3.connect(DB_NAME) as conn:
@@ -564,21 +755,26 @@ def get_sentiment_snapshots(ticker, hours=24):
             results.append(item)
         return results
 
-def get_latest_sentiment_by_source(ticker):
-    """Get the most recent sentiment from each source for a ticker."""
+def get_latest_sentiment_by_source(ticker, max_age_hours=None):
+    """
+    Get the most recent sentiment from each source for a ticker.
+    With max_age_hours, sources whose latest snapshot is older are left out.
+    """
+    age_clause = "AND timestamp >= datetime('now', ?)" if max_age_hours else ""
+    params = (ticker, f'-{max_age_hours} hours') if max_age_hours else (ticker,)
     with sqlite3.connect(DB_NAME) as conn:
         conn.row_factory = sqlite3.Row
         c = conn.cursor()
-        c.execute("""
+        c.execute(f"""
             SELECT s1.* FROM sentiment_snapshots s1
             INNER JOIN (
                 SELECT source, MAX(timestamp) as max_ts
                 FROM sentiment_snapshots
-                WHERE ticker = ?
+                WHERE ticker = ? {age_clause}
                 GROUP BY source
             ) s2 ON s1.source = s2.source AND s1.timestamp = s2.max_ts
             WHERE s1.ticker = ?
-        """, (ticker, ticker))
+        """, params + (ticker,))
         results = {}
         for row in c.fetchall():
             item = dict(row)
@@ -854,13 +1050,11 @@ def save_fred_indicators_bulk(indicators):
     """Bulk save FRED indicator values. indicators is list of dicts."""
     with sqlite3.connect(DB_NAME) as conn:
         c = conn.cursor()
-        for ind in indicators:
-            c.execute('''
-                INSERT OR REPLACE INTO fred_indicators
-                (series_id, indicator_name, category, value, observation_date)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (ind['series_id'], ind['indicator_name'], ind['category'],
-                  ind['value'], ind['observation_date']))
+        c.executemany('''
+            INSERT OR REPLACE INTO fred_indicators
+            (series_id, indicator_name, category, value, observation_date)
+            VALUES (:series_id, :indicator_name, :category, :value, :observation_date)
+        ''', indicators)
         conn.commit()
     return len(indicators)
 
@@ -912,6 +1106,26 @@ def get_fred_indicator_history(series_id, years=10):
         return [dict(row) for row in c.fetchall()]
 
 
+def get_fred_indicator_histories(years=10):
+    """
+    Get the full history of every series in one query.
+    Returns {series_id: [(observation_date, value, in_window), ...]} in date order;
+    in_window marks rows inside the `years` percentile window.
+    """
+    with sqlite3.connect(DB_NAME) as conn:
+        c = conn.cursor()
+        c.execute("""
+            SELECT series_id, observation_date, value, observation_date >= date('now', ?)
+            FROM fred_indicators
+            WHERE value IS NOT NULL
+            ORDER BY series_id, observation_date ASC
+        """, (f'-{years} years',))
+        histories = {}
+        for series_id, observation_date, value, in_window in c.fetchall():
+            histories.setdefault(series_id, []).append((observation_date, value, in_window))
+        return histories
+
+
 def save_indicator_health_score(series_id, observation_date, raw_value, health_score,
                                  trend=None, percentile=None):
     """Save normalized health score for an indicator."""
@@ -925,6 +1139,24 @@ def save_indicator_health_score(series_id, observation_date, raw_value, health_s
         conn.commit()
 
 
+def save_indicator_health_scores_bulk(scores):
+    """Bulk save indicator health scores in one transaction. scores is list of dicts."""
+    with sqlite3.connect(DB_NAME) as conn:
+        c = conn.cursor()
+        c.executemany('''
+            INSERT INTO indicator_health_scores
+            (series_id, observation_date, raw_value, health_score, trend, percentile)
+            VALUES (:series_id, :observation_date, :raw_value, :health_score, :trend, :percentile)
+            ON CONFLICT(series_id, observation_date) DO UPDATE SET
+                raw_value = excluded.raw_value,
+                health_score = excluded.health_score,
+                trend = excluded.trend,
+                percentile = excluded.percentile
+        ''', scores)
+        conn.commit()
+    return len(scores)
+
+
 def get_latest_health_scores():
     """Get most recent health score for each indicator."""
     with sqlite3.connect(DB_NAME) as conn:
@@ -974,6 +1206,37 @@ def get_latest_economic_health():
         return dict(row) if row else None
 
 
+def get_latest_health_bundle():
+    """
+    Everything get_current_health needs, read on one connection and snapshot:
+    {'has_indicators': bool, 'health': latest composite or None,
+     'scores': {series_id: latest health score row}}.
+    """
+    with sqlite3.connect(DB_NAME) as conn:
+        conn.row_factory = sqlite3.Row
+        c = conn.cursor()
+        c.execute("BEGIN")
+
+        c.execute("SELECT EXISTS(SELECT 1 FROM fred_indicators)")
+        has_indicators = bool(c.fetchone()[0])
+
+        c.execute("SELECT * FROM economic_health_composite ORDER BY date DESC LIMIT 1")
+        row = c.fetchone()
+        health = dict(row) if row else None
+
+        c.execute("""
+            SELECT h1.* FROM indicator_health_scores h1
+            INNER JOIN (
+                SELECT series_id, MAX(observation_date) as max_date
+                FROM indicator_health_scores
+                GROUP BY series_id
+            ) h2 ON h1.series_id = h2.series_id AND h1.observation_date = h2.max_date
+        """)
+        scores = {row['series_id']: dict(row) for row in c.fetchall()}
+
+        return {'has_indicators': has_indicators, 'health': health, 'scores': scores}
+
+
 def get_economic_health_history(days=730):
     """Get economic health history (default 2 years)."""
     with sqlite3.connect(DB_NAME) as conn:
@@ -987,15 +1250,30 @@ def get_economic_health_history(days=730):
         return [dict(row) for row in c.fetchall()]
 
 
-def get_yield_curve_history(months=6):
-    """Get yield curve spread history for inversion detection."""
+def get_latest_yield_curve():
+    """Get the most recent yield curve spread (T10Y2Y) observation."""
     with sqlite3.connect(DB_NAME) as conn:
         conn.row_factory = sqlite3.Row
         c = conn.cursor()
         c.execute("""
+            SELECT observation_date, value FROM fred_indicators
+            WHERE series_id = 'T10Y2Y'
+            ORDER BY observation_date DESC LIMIT 1
+        """)
+        row = c.fetchone()
+        return dict(row) if row else None
+
+
+def get_yield_curve_history(months=6, newest_first=False):
+    """Get yield curve spread history for inversion detection."""
+    order = 'DESC' if newest_first else 'ASC'
+    with sqlite3.connect(DB_NAME) as conn:
+        conn.row_factory = sqlite3.Row
+        c = conn.cursor()
+        c.execute(f"""
             SELECT observation_date, value FROM fred_indicators
             WHERE series_id = 'T10Y2Y' AND observation_date >= date('now', ?)
-            ORDER BY observation_date ASC
+            ORDER BY observation_date {order}
         """, (f'-{months} months',))
         return [dict(row) for row in c.fetchall()]
 
@@ -1,25 +1,61 @@
+import copy
+import hashlib
 import json
 import os
 import sys
 import re
+import threading
+from collections import OrderedDict
 from ollama import Client
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from config import GICS_SECTORS
 
-GICS_SECTORS = [
-    "Technology", "Healthcare", "Financials", "Consumer Discretionary",
-    "Consumer Staples", "Energy", "Materials", "Industrials",
-    "Utilities", "Real Estate", "Communication Services"
-]
+# Lower-cased once for validate_sector's substring matching
+_GICS_LOWER = tuple((gics, gics.lower()) for gics in GICS_SECTORS)
+SECTORS_PROMPT_LIST = ", ".join(GICS_SECTORS)
 
-COMMON_TICKERS = {
+_JSON_DECODER = json.JSONDecoder()
+# Keys an analysis must have; a nested object (e.g. inside "catalysts") lacks them
+_ANALYSIS_KEYS = ('summary', 'impact_score')
+
+SYSTEM_PROMPT = f"""You are an expert financial analyst. Analyze the financial news article sent by the user.
+
+TASK:
+Return a single valid JSON object with these keys:
+1. "summary": A concise summary in ROMANIAN (max 2 sentences).
+2. "impact_score": Integer 1-10 (10 = critical market impact).
+3. "is_important": true if score >= 7, else false.
+4. "sentiment": "positive", "negative", or "neutral".
+5. "tickers": Array of stock ticker symbols mentioned (e.g., ["AAPL", "MSFT"]). Empty array if none.
+6. "sector": Primary GICS sector from: {SECTORS_PROMPT_LIST}. Use null if unclear.
+7. "direction": Trading signal - "bullish", "bearish", or "neutral".
+8. "confidence": Float 0.0-1.0 indicating confidence in the direction signal.
+9. "catalysts": Array of market catalysts (e.g., ["earnings", "acquisition", "guidance", "regulation", "layoffs"]). Empty array if none.
+
+IMPORTANT: Output ONLY the JSON. No introduction or explanation.
+"""
+
+COMMON_TICKERS = frozenset({
     "AAPL", "MSFT", "GOOGL", "GOOG", "AMZN", "META", "NVDA", "TSLA",
     "JPM", "V", "JNJ", "WMT", "PG", "MA", "UNH", "HD", "DIS", "BAC",
     "XOM", "CVX", "PFE", "KO", "PEP", "ABBV", "MRK", "TMO", "COST",
     "AVGO", "CSCO", "ACN", "ORCL", "CRM", "AMD", "INTC", "QCOM",
     "NFLX", "ADBE", "TXN", "IBM", "PYPL", "NOW", "UBER", "SQ", "SHOP"
-}
+})
+
+# Compiled once at import; validate_tickers runs for every analyzed article
+TICKER_PATTERN = re.compile(r'[A-Z]{1,5}')
+
+# In-process LRU of analyses keyed by a hash of the text sent to the model,
+# so an article syndicated under several URLs costs one Ollama call
+ANALYSIS_CACHE_SIZE = 512
+_analysis_cache = OrderedDict()
+_analysis_cache_lock = threading.Lock()
+# Hashes being analyzed right now -> Event set when that call finishes, so a
+# duplicate in the same scan wave waits for it instead of calling Ollama again
+_analysis_inflight = {}
 
 def validate_tickers(tickers):
     """Filter tickers to known symbols or valid format (1-5 uppercase letters)."""
@@ -28,9 +64,7 @@ def validate_tickers(tickers):
     validated = []
     for t in tickers:
         t = t.upper().strip()
-        if t in COMMON_TICKERS:
-            validated.append(t)
-        elif re.match(r'^[A-Z]{1,5}$', t):
+        if t in COMMON_TICKERS or TICKER_PATTERN.fullmatch(t):
             validated.append(t)
     return validated
 
@@ -39,8 +73,8 @@ def validate_sector(sector):
     if not sector:
         return None
     sector_lower = sector.lower()
-    for gics in GICS_SECTORS:
-        if gics.lower() in sector_lower or sector_lower in gics.lower():
+    for gics, gics_lower in _GICS_LOWER:
+        if gics_lower in sector_lower or sector_lower in gics_lower:
             return gics
     if "tech" in sector_lower or "software" in sector_lower:
         return "Technology"
@@ -54,34 +88,52 @@ def validate_sector(sector):
         return "Consumer Discretionary"
     return None
 
+_ollama_client = None
+_ollama_client_lock = threading.Lock()
+
 def get_ollama_client():
-    """Configurează conexiunea către serverul Cloud."""
-    # Dacă avem o cheie în .env, o punem în headers
-    headers = {}  
-    if config.OLLAMA_KEY:
-        headers["Authorization"] = f"Bearer {config.OLLAMA_KEY}"
-    
-    # Inițializăm clientul cu Host-ul din config
-    return Client(host=config.OLLAMA_HOST, headers=headers)
+    """Configurează conexiunea către serverul Cloud (un singur client, refolosit)."""
+    global _ollama_client
+    if _ollama_client is not None:
+        return _ollama_client
+
+    # scan_news analizează pe mai multe thread-uri: doar primul creează clientul.
+    # Clientul (httpx) poate fi apoi folosit în paralel de toate thread-urile.
+    with _ollama_client_lock:
+        if _ollama_client is None:
+            # Dacă avem o cheie în .env, o punem în headers
+            headers = {}
+            if config.OLLAMA_KEY:
+                headers["Authorization"] = f"Bearer {config.OLLAMA_KEY}"
+
+            # Inițializăm clientul cu Host-ul din config; conexiunea HTTP rămâne
+            # deschisă între articole în loc să refacem handshake-ul TLS de fiecare dată
+            _ollama_client = Client(host=config.OLLAMA_HOST, headers=headers)
+    return _ollama_client
 
 def clean_json_response(response_text):
     """
     AI-ul e vorbăreț. Uneori zice: 'Sigur, iată JSON-ul: { ... }'.
-    Noi vrem doar partea dintre acolade { ... }.
+    Noi vrem doar obiectul dintre acolade { ... }.
     """
-    try:
-        # Căutăm prima acoladă deschisă și ultima închisă
-        start = response_text.find('{')
-        end = response_text.rfind('}') + 1
-        
-        if start == -1 or end == 0:
-            return None
-            
-        json_str = response_text[start:end]
-        return json.loads(json_str)
-    except Exception as e:
-        print(f"❌ Eroare la curățarea JSON: {e}")
-        return None
+    # raw_decode citește exact un obiect JSON și se oprește, fără să mai
+    # scaneze textul de la coadă după ultima acoladă
+    start = response_text.find('{')
+    error = None
+    while start != -1:
+        try:
+            data, _ = _JSON_DECODER.raw_decode(response_text, start)
+            # Acceptăm doar obiectul analizei, nu un fragment din interiorul lui
+            if isinstance(data, dict) and all(key in data for key in _ANALYSIS_KEYS):
+                return data
+        except ValueError as e:
+            error = error or e
+        # Acolada găsită făcea parte din text, nu din JSON: încercăm următoarea
+        start = response_text.find('{', start + 1)
+
+    if error:
+        print(f"❌ Eroare la curățarea JSON: {error}")
+    return None
 
 def analyze_article(text):
     """Main analysis function with quant signal extraction."""
@@ -90,34 +142,35 @@ def analyze_article(text):
         print("   [AI] Text too short for analysis.")
         return None
 
-    sectors_list = ", ".join(GICS_SECTORS)
-    prompt = f"""You are an expert financial analyst. Analyze this financial news article.
-
-ARTICLE:
-{text[:6000]}
-
-TASK:
-Return a single valid JSON object with these keys:
-1. "summary": A concise summary in ROMANIAN (max 2 sentences).
-2. "impact_score": Integer 1-10 (10 = critical market impact).
-3. "is_important": true if score >= 7, else false.
-4. "sentiment": "positive", "negative", or "neutral".
-5. "tickers": Array of stock ticker symbols mentioned (e.g., ["AAPL", "MSFT"]). Empty array if none.
-6. "sector": Primary GICS sector from: {sectors_list}. Use null if unclear.
-7. "direction": Trading signal - "bullish", "bearish", or "neutral".
-8. "confidence": Float 0.0-1.0 indicating confidence in the direction signal.
-9. "catalysts": Array of market catalysts (e.g., ["earnings", "acquisition", "guidance", "regulation", "layoffs"]). Empty array if none.
-
-IMPORTANT: Output ONLY the JSON. No introduction or explanation.
-"""
+    article = text[:6000]
+    text_hash = hashlib.blake2b(article.encode('utf-8'), digest_size=16).hexdigest()
+    while True:
+        with _analysis_cache_lock:
+            cached = _analysis_cache.get(text_hash)
+            if cached is not None:
+                _analysis_cache.move_to_end(text_hash)
+                break
+            pending = _analysis_inflight.get(text_hash)
+            if pending is None:
+                # Nobody is analyzing this text: this thread does it
+                _analysis_inflight[text_hash] = threading.Event()
+                break
+        # Same text already on its way to Ollama; if that call fails, retry here
+        pending.wait()
+    if cached is not None:
+        print("   [AI] Same article text analyzed before, reusing result.")
+        return copy.deepcopy(cached)
 
     try:
         print(f"   [AI] Sending request to {config.OLLAMA_MODEL}...")
         client = get_ollama_client()
 
+        # The static instructions go first, so the server can reuse their
+        # prompt cache; only the article tokens change between calls
         response = client.chat(model=config.OLLAMA_MODEL, messages=[
-            {'role': 'user', 'content': prompt},
-        ])
+            {'role': 'system', 'content': SYSTEM_PROMPT},
+            {'role': 'user', 'content': f"ARTICLE:\n{article}"},
+        ], keep_alive=config.OLLAMA_KEEP_ALIVE)
 
         raw_content = response['message']['content']
         data = clean_json_response(raw_content)
@@ -137,6 +190,11 @@ IMPORTANT: Output ONLY the JSON. No introduction or explanation.
 
             print(f"   ✅ Analysis complete! Score: {data.get('impact_score')}, "
                   f"Direction: {data.get('direction')}, Tickers: {data.get('tickers')}")
+
+            with _analysis_cache_lock:
+                _analysis_cache[text_hash] = copy.deepcopy(data)
+                if len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+                    _analysis_cache.popitem(last=False)
         else:
             print("   ⚠️ AI responded but did not return valid JSON.")
 
@@ -144,4 +202,7 @@ IMPORTANT: Output ONLY the JSON. No introduction or explanation.
 
     except Exception as e:
         print(f"❌ AI connection error: {e}")
-        return None
\ No newline at end of file
+        return None
+    finally:
+        with _analysis_cache_lock:
+            _analysis_inflight.pop(text_hash).set()
\ No newline at end of file
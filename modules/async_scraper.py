@@ -153,8 +153,18 @@ def extract_text_from_html(html_content: str) -> str:
     return clean_text
 
 
-async def scrape_with_aiohttp(url: str, timeout: int = 10) -> str:
-    """Fast async HTTP scraping using aiohttp."""
+async def _fetch_text(session: aiohttp.ClientSession, url: str, headers: dict, timeout: int) -> str:
+    """GET url on the given session and extract article text ("" on non-200)."""
+    async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+        if response.status != 200:
+            return ""
+        html = await response.text()
+        return extract_text_from_html(html)
+
+
+async def scrape_with_aiohttp(url: str, timeout: int = 10,
+                             session: Optional[aiohttp.ClientSession] = None) -> str:
+    """Fast async HTTP scraping using aiohttp (reuses `session` if given)."""
     headers = {
         'User-Agent': random.choice(USER_AGENTS),
         'Accept-Language': 'en-US,en;q=0.9',
@@ -162,12 +172,10 @@ async def scrape_with_aiohttp(url: str, timeout: int = 10) -> str:
     }
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
-                if response.status != 200:
-                    return ""
-                html = await response.text()
-                return extract_text_from_html(html)
+        if session is None:
+            async with aiohttp.ClientSession() as own_session:
+                return await _fetch_text(own_session, url, headers, timeout)
+        return await _fetch_text(session, url, headers, timeout)
     except Exception as e:
         print(f"   [aiohttp] Failed {url}: {e}")
         return ""
@@ -233,7 +241,8 @@ async def scrape_with_playwright_async(url: str, pool: BrowserPool = None) -> st
     return text
 
 
-async def scrape_article_async(url: str, use_playwright_fallback: bool = True) -> Tuple[str, str]:
+async def scrape_article_async(url: str, use_playwright_fallback: bool = True,
+                               session: Optional[aiohttp.ClientSession] = None) -> Tuple[str, str]:
     """
     Scrape a single article asynchronously.
 
@@ -241,7 +250,7 @@ async def scrape_article_async(url: str, use_playwright_fallback: bool = True) -
         Tuple of (url, content)
     """
     # Try fast method first
-    content = await scrape_with_aiohttp(url)
+    content = await scrape_with_aiohttp(url, session=session)
 
     if content and len(content) > 300:
         return (url, content)
@@ -276,27 +285,27 @@ async def scrape_articles_batch(
     completed = 0
     total = len(urls)
 
-    async def scrape_one(url: str) -> Tuple[str, str]:
+    async def scrape_one(url: str, session: aiohttp.ClientSession) -> Tuple[str, str]:
         nonlocal completed
         async with semaphore:
-            result = await scrape_article_async(url, use_playwright_fallback)
+            result = await scrape_article_async(url, use_playwright_fallback, session)
             completed += 1
             if progress_callback:
                 progress_callback(completed, total)
             return result
 
-    # Create tasks for all URLs
-    tasks = [scrape_one(url) for url in urls]
-
-    # Run concurrently and gather results
-    scraped = await asyncio.gather(*tasks, return_exceptions=True)
-
-    for item in scraped:
-        if isinstance(item, tuple):
-            url, content = item
+    # One connection pool for the whole batch (keep-alive per host)
+    connector = aiohttp.TCPConnector(limit=max_concurrent * 4, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        # Collect each result as soon as its task finishes; a failing task
+        # only loses its own URL
+        for next_done in asyncio.as_completed([scrape_one(url, session) for url in urls]):
+            try:
+                url, content = await next_done
+            except Exception as e:
+                print(f"   [Batch] Task exception: {e}")
+                continue
             results[url] = content
-        elif isinstance(item, Exception):
-            print(f"   [Batch] Task exception: {item}")
 
     return results
 
@@ -4,60 +4,95 @@ Computes composite Economic Health Index and regime classification.
 """
 import logging
 from datetime import datetime, date
+from functools import lru_cache
 from typing import Optional
-from statistics import mean
 
-from config import FRED_INDICATORS, CATEGORY_WEIGHTS, REGIME_THRESHOLDS
+import numpy as np
+
+from config import FRED_INDICATORS, FRED_INDICATOR_SPECS, CATEGORY_WEIGHTS, REGIME_THRESHOLDS
 import database
 from modules.indicator_normalizer import get_normalizer, normalize_indicators
 from modules.fred_fetcher import get_fred_fetcher
 
 logger = logging.getLogger(__name__)
 
+_TOTAL_WEIGHT = sum(CATEGORY_WEIGHTS.values())
+
+@lru_cache(maxsize=16)
+def _make_composite(categories: frozenset):
+    """
+    Build the composite weighting for one set of available categories.
+    Returns None when none of CATEGORY_WEIGHTS is present.
+    """
+    terms = tuple((c, w) for c, w in CATEGORY_WEIGHTS.items() if c in categories)
+    if not terms:
+        return None
+
+    def composite(category_scores: dict) -> float:
+        return sum(category_scores[c] * w for c, w in terms) / _TOTAL_WEIGHT
+
+    return composite
+
 
 class EconomicHealthCalculator:
     """Calculates composite economic health index and regime."""
 
     def __init__(self):
         self.normalizer = get_normalizer()
+        # Snapshot of calculate_health keyed by ISO date; FRED data is daily
+        self._cache = {}
+
+    def invalidate(self):
+        """Drop cached health and indicator scores (call after fetching new FRED data)."""
+        self._cache.clear()
+        # The history cache is keyed on the latest observation dates only, so a
+        # backfill or revision of older rows would otherwise keep old percentiles
+        self.normalizer.clear_cache()
 
-    def calculate_category_scores(self, indicator_scores: dict) -> dict:
+    def _aggregate(self, indicator_scores: dict) -> tuple:
         """
-        Calculate average health score for each category.
-        Returns {category: score}.
+        Single pass over indicator scores.
+        Returns (category_scores, improving_count, deteriorating_count),
+        where category_scores is {category: average health score}.
         """
-        category_values = {}
-
-        for series_id, data in indicator_scores.items():
-            category = data.get('category', 'other')
-            if category not in category_values:
-                category_values[category] = []
-            category_values[category].append(data['health_score'])
-
-        category_scores = {}
-        for category, values in category_values.items():
-            if values:
-                category_scores[category] = round(mean(values), 1)
+        cat_to_id = {}
+        cat_ids = np.empty(len(indicator_scores), dtype=np.intp)
+        scores = np.empty(len(indicator_scores), dtype=np.float64)
+        improving = 0
+        deteriorating = 0
+
+        for i, data in enumerate(indicator_scores.values()):
+            cat_ids[i] = cat_to_id.setdefault(data.get('category', 'other'), len(cat_to_id))
+            scores[i] = data['health_score']
+            trend = data.get('trend')
+            if trend == 'improving':
+                improving += 1
+            elif trend == 'deteriorating':
+                deteriorating += 1
+
+        # Group-by mean in C: per-category sums / per-category counts
+        sums = np.bincount(cat_ids, weights=scores, minlength=len(cat_to_id))
+        counts = np.bincount(cat_ids, minlength=len(cat_to_id))
+        means = np.round(sums / np.maximum(counts, 1), 1)
+
+        category_scores = {
+            category: float(means[cat_id])
+            for category, cat_id in cat_to_id.items()
+        }
 
-        return category_scores
+        return category_scores, improving, deteriorating
 
     def calculate_composite_score(self, category_scores: dict) -> float:
         """
         Calculate weighted composite Economic Health Index.
+        Divides by the full category weight, so missing categories pull the
+        index down (counted as 0) instead of being renormalized away.
         """
-        total_weight = 0
-        weighted_sum = 0
-
-        for category, weight in CATEGORY_WEIGHTS.items():
-            if category in category_scores:
-                weighted_sum += category_scores[category] * weight
-                total_weight += weight
-
-        if total_weight == 0:
+        composite = _make_composite(frozenset(category_scores))
+        if composite is None:
             return 50.0
 
-        # Normalize by actual weight used (in case some categories missing)
-        return round(weighted_sum / total_weight * (total_weight / sum(CATEGORY_WEIGHTS.values())), 1)
+        return round(composite(category_scores), 1)
 
     def classify_regime(self, score: float, trend: str = 'stable') -> str:
         """
@@ -77,37 +112,39 @@ class EconomicHealthCalculator:
         Detect yield curve inversion and duration.
         Returns (is_inverted, months_inverted).
         """
-        # Get T10Y2Y (10-year minus 2-year Treasury spread)
-        history = database.get_yield_curve_history(months=6)
+        # Get T10Y2Y (10-year minus 2-year Treasury spread); a non-negative
+        # latest reading (the usual case) needs no history scan
+        latest = database.get_latest_yield_curve()
+        if not latest or latest['value'] >= 0:
+            return False, 0
 
+        history = database.get_yield_curve_history(months=6, newest_first=True)
         if not history:
             return False, 0
 
-        # Check current state
-        latest = history[-1] if history else None
-        is_inverted = latest and latest['value'] < 0
-
-        # Count consecutive months of inversion
+        # Count consecutive months of inversion, most recent first,
+        # stopping at the first month whose average spread is non-negative
         months_inverted = 0
-        if is_inverted:
-            # Group by month and check consecutive inversions
-            monthly_data = {}
-            for h in history:
-                month_key = h['observation_date'][:7]  # YYYY-MM
-                if month_key not in monthly_data:
-                    monthly_data[month_key] = []
-                monthly_data[month_key].append(h['value'])
-
-            # Check from most recent backwards
-            sorted_months = sorted(monthly_data.keys(), reverse=True)
-            for month in sorted_months:
-                avg_value = mean(monthly_data[month])
-                if avg_value < 0:
+        current_month = None
+        month_sum = 0.0
+        month_n = 0
+        for h in history:
+            month = h['observation_date'][:7]  # YYYY-MM
+            if month != current_month:
+                if month_n:
+                    if month_sum / month_n >= 0:
+                        return True, months_inverted
                     months_inverted += 1
-                else:
-                    break
+                current_month = month
+                month_sum = 0.0
+                month_n = 0
+            month_sum += h['value']
+            month_n += 1
+
+        if month_n and month_sum / month_n < 0:
+            months_inverted += 1
 
-        return is_inverted, months_inverted
+        return True, months_inverted
 
     def calculate_recession_probability(self, indicator_scores: dict,
                                          yield_curve_inverted: bool,
@@ -156,11 +193,20 @@ class EconomicHealthCalculator:
 
         return min(95, max(5, probability))
 
-    def calculate_health(self) -> dict:
+    def calculate_health(self, force: bool = False) -> dict:
         """
         Calculate and store complete economic health snapshot.
         Returns full health data including indicators, categories, composite, regime.
+        Cached per day; force=True recomputes from fresh FRED data.
         """
+        if force:
+            self.invalidate()
+
+        today = date.today().isoformat()
+        cached = self._cache.get(today)
+        if cached is not None:
+            return cached
+
         # Normalize all indicators
         indicator_scores = normalize_indicators()
 
@@ -168,8 +214,8 @@ class EconomicHealthCalculator:
             logger.warning("No indicator data available for health calculation")
             return None
 
-        # Calculate category scores
-        category_scores = self.calculate_category_scores(indicator_scores)
+        # Category scores and trend counts in one pass
+        category_scores, improving_count, deteriorating_count = self._aggregate(indicator_scores)
 
         # Calculate composite score
         composite_score = self.calculate_composite_score(category_scores)
@@ -186,9 +232,6 @@ class EconomicHealthCalculator:
         )
 
         # Determine overall trend
-        improving_count = sum(1 for d in indicator_scores.values() if d.get('trend') == 'improving')
-        deteriorating_count = sum(1 for d in indicator_scores.values() if d.get('trend') == 'deteriorating')
-
         if improving_count > deteriorating_count * 1.5:
             overall_trend = 'improving'
         elif deteriorating_count > improving_count * 1.5:
@@ -197,7 +240,6 @@ class EconomicHealthCalculator:
             overall_trend = 'stable'
 
         # Store composite in database
-        today = date.today().isoformat()
         database.save_economic_health_composite(
             date=today,
             overall_score=composite_score,
@@ -222,36 +264,38 @@ class EconomicHealthCalculator:
             'data_completeness': round(len(indicator_scores) / len(FRED_INDICATORS) * 100, 1)
         }
 
-        logger.info(f"Economic health calculated: {composite_score} ({regime})")
+        logger.info("Economic health calculated: %s (%s)", composite_score, regime)
+        self._cache = {today: result}
         return result
 
     def get_current_health(self) -> dict:
         """
         Get current economic health from database, calculating if needed.
         """
+        bundle = database.get_latest_health_bundle()
+
         # First check if we have any FRED data at all
-        latest_indicators = database.get_latest_fred_indicators()
-        if not latest_indicators:
+        if not bundle['has_indicators']:
             logger.warning("No FRED indicator data in database")
             return None
 
-        latest = database.get_latest_economic_health()
+        latest = bundle['health']
 
         if latest:
             # Enrich with indicator details
-            indicator_scores = database.get_latest_health_scores()
+            indicator_scores = bundle['scores']
 
             # If no health scores but we have indicators, recalculate
-            if not indicator_scores and latest_indicators:
+            if not indicator_scores:
                 return self.calculate_health()
 
             latest['indicators'] = {}
             for series_id, data in indicator_scores.items():
-                config = FRED_INDICATORS.get(series_id, {})
+                spec = FRED_INDICATOR_SPECS.get(series_id)
                 latest['indicators'][series_id] = {
                     **data,
-                    'name': config.get('name', series_id),
-                    'category': config.get('category', 'other')
+                    'name': spec.name if spec else series_id,
+                    'category': spec.category if spec else 'other'
                 }
 
             # Update data completeness based on actual indicators
@@ -283,10 +327,10 @@ def get_health_calculator() -> EconomicHealthCalculator:
     return _health_calculator
 
 
-def calculate_economic_health() -> dict:
+def calculate_economic_health(force: bool = False) -> dict:
     """Convenience function to calculate economic health."""
     calculator = get_health_calculator()
-    return calculator.calculate_health()
+    return calculator.calculate_health(force=force)
 
 
 def get_economic_health() -> dict:
@@ -310,10 +354,10 @@ def refresh_economic_data(backfill: bool = False) -> dict:
 
     # Fetch data from FRED
     count = fetcher.fetch_and_store(backfill=backfill)
-    logger.info(f"Fetched {count} FRED observations")
+    logger.info("Fetched %d FRED observations", count)
 
-    # Recalculate health
-    health = calculate_economic_health()
+    # Recalculate health from the fresh observations
+    health = calculate_economic_health(force=True)
 
     return {
         'observations_fetched': count,
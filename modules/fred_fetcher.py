@@ -2,8 +2,11 @@
 FRED Economic Data Fetcher
 Fetches economic indicators from the Federal Reserve Economic Data API.
 """
+import asyncio
 import logging
-from datetime import datetime, timedelta
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
 from typing import Optional
 
 try:
@@ -13,12 +16,35 @@ except ImportError:
     FRED_AVAILABLE = False
     Fred = None
 
-from config import FRED_API_KEY, FRED_INDICATORS
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+    httpx = None
+
+from config import FRED_API_KEY, FRED_INDICATORS, FRED_INDICATOR_SPECS
 import database
 from modules.rate_limiter import acquire, can_request
 
 logger = logging.getLogger(__name__)
 
+FRED_OBSERVATIONS_URL = "https://api.stlouisfed.org/fred/series/observations"
+
+# Parallel series fetches; the check-and-take on the 'fred' bucket must be atomic
+FETCH_WORKERS = 6
+FETCH_CONCURRENCY = 8  # in-flight requests on the async (httpx) path
+_rate_lock = threading.Lock()
+
+
+def _take_fred_token() -> bool:
+    """Atomically check and consume one 'fred' rate-limit token (never sleeps)."""
+    with _rate_lock:
+        if not can_request('fred'):
+            return False
+        acquire('fred')
+        return True
+
 
 class FredFetcher:
     """Fetches economic indicators from FRED API."""
@@ -43,41 +69,101 @@ class FredFetcher:
             logger.warning("FRED API not available (missing fredapi or API key)")
             return []
 
-        if not can_request('fred'):
+        if not _take_fred_token():
             logger.warning("FRED rate limit reached, skipping fetch")
             return []
 
         try:
-            acquire('fred')
 
             # Fetch all available data - don't restrict by dates
             # (FRED only has data up to the actual current date, not future dates)
             series = self.fred.get_series(series_id)
 
             if series is None or series.empty:
-                logger.warning(f"No data returned for {series_id}")
+                logger.warning("No data returned for %s", series_id)
                 return []
 
-            # If start_date specified, filter results
-            results = []
-            for date, value in series.items():
-                # Skip if before start_date
-                if start_date and date.to_pydatetime() < start_date:
-                    continue
-                # Skip NaN values
-                if value is not None and not (isinstance(value, float) and value != value):
-                    results.append({
-                        'observation_date': date.strftime('%Y-%m-%d'),
-                        'value': float(value)
-                    })
-
-            logger.info(f"Fetched {len(results)} observations for {series_id}")
+            # Drop NaN values and, if start_date specified, older observations
+            series = series.dropna()
+            if start_date:
+                series = series[series.index >= start_date]
+
+            results = [
+                {'observation_date': date, 'value': value}
+                for date, value in zip(series.index.strftime('%Y-%m-%d').tolist(),
+                                       series.astype(float).tolist())
+            ]
+
+            logger.info("Fetched %d observations for %s", len(results), series_id)
             return results
 
         except Exception as e:
-            logger.error(f"Error fetching {series_id}: {e}")
+            logger.error("Error fetching %s: %s", series_id, e)
             return []
 
+    async def _fetch_indicator_async(self, client, semaphore, series_id: str,
+                                     start_date: Optional[datetime] = None) -> list:
+        """
+        Fetch a single indicator straight from the FRED REST API.
+        Returns list of {observation_date, value} dicts, like fetch_indicator.
+        """
+        if not _take_fred_token():
+            logger.warning("FRED rate limit reached, skipping fetch")
+            return []
+
+        params = {'series_id': series_id, 'api_key': self.api_key, 'file_type': 'json'}
+        if start_date:
+            params['observation_start'] = start_date.strftime('%Y-%m-%d')
+
+        try:
+            async with semaphore:
+                response = await client.get(FRED_OBSERVATIONS_URL, params=params)
+            response.raise_for_status()
+
+            # FRED marks missing observations with "."
+            results = [
+                {'observation_date': obs['date'], 'value': float(obs['value'])}
+                for obs in response.json().get('observations', [])
+                if obs.get('value') not in (None, '.')
+            ]
+            logger.info("Fetched %d observations for %s", len(results), series_id)
+            return results
+
+        except Exception as e:
+            # httpx error messages include the request URL, which carries the API key
+            if HTTPX_AVAILABLE and isinstance(e, httpx.HTTPStatusError):
+                logger.error("Error fetching %s: HTTP %d", series_id, e.response.status_code)
+            else:
+                logger.error("Error fetching %s: %s", series_id, type(e).__name__)
+            return []
+
+    async def _fetch_all_async(self, series_ids: list,
+                               start_date: Optional[datetime] = None) -> dict:
+        """Fetch the given series concurrently on one HTTP client."""
+        semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+        async with httpx.AsyncClient(timeout=httpx.Timeout(15.0, connect=5.0)) as client:
+            data = await asyncio.gather(*(
+                self._fetch_indicator_async(client, semaphore, series_id, start_date)
+                for series_id in series_ids
+            ))
+        return dict(zip(series_ids, data))
+
+    @staticmethod
+    def _series_due(latest: dict, today: date) -> list:
+        """
+        Series for which FRED may have published a new observation, i.e. whose
+        latest stored observation is at least one release cadence old.
+        """
+        due = []
+        for series_id in FRED_INDICATORS:
+            row = latest.get(series_id)
+            if row:
+                last_obs = date.fromisoformat(row['observation_date'][:10])
+                if (today - last_obs).days < FRED_INDICATOR_SPECS[series_id].cadence_days:
+                    continue
+            due.append(series_id)
+        return due
+
     def fetch_all_indicators(self, backfill: bool = False) -> dict:
         """
         Fetch all configured indicators.
@@ -88,23 +174,50 @@ class FredFetcher:
             return {}
 
         results = {}
+        fetched = {}
         start_date = None
 
+        series_ids = list(FRED_INDICATORS)
         if not backfill:
             # Only fetch last 30 days for regular updates
             start_date = datetime.now() - timedelta(days=30)
 
-        total = len(FRED_INDICATORS)
-        for i, (series_id, config) in enumerate(FRED_INDICATORS.items(), 1):
-            print(f"[FRED] Fetching {i}/{total}: {config['name']} ({series_id})...")
-            logger.info(f"Fetching {i}/{total}: {series_id}")
-            data = self.fetch_indicator(series_id, start_date=start_date)
-            if data:
+            # Skip series that cannot have a new release yet (e.g. monthly CPI)
+            series_ids = self._series_due(database.get_latest_fred_indicators(), date.today())
+            skipped = len(FRED_INDICATORS) - len(series_ids)
+            if skipped:
+                print(f"[FRED] Skipping {skipped} indicators with no new release due")
+
+        total = len(series_ids)
+        if not series_ids:
+            print("[FRED] All indicators are up to date.")
+        elif HTTPX_AVAILABLE:
+            print(f"[FRED] Fetching {total} indicators (async, {FETCH_CONCURRENCY} at a time)...")
+            fetched = {sid: data for sid, data in asyncio.run(self._fetch_all_async(series_ids, start_date)).items() if data}
+            for series_id, data in fetched.items():
+                print(f"[FRED] Got {len(data)} observations for {FRED_INDICATORS[series_id]['name']} ({series_id})")
+        else:
+            print(f"[FRED] Fetching {total} indicators ({FETCH_WORKERS} in parallel)...")
+            with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+                futures = {
+                    pool.submit(self.fetch_indicator, series_id, start_date): series_id
+                    for series_id in series_ids
+                }
+                for i, future in enumerate(as_completed(futures), 1):
+                    series_id = futures[future]
+                    data = future.result()
+                    logger.info("Fetched %d/%d: %s", i, total, series_id)
+                    if data:
+                        fetched[series_id] = data
+                        print(f"[FRED] Got {len(data)} observations for {FRED_INDICATORS[series_id]['name']} ({series_id})")
+
+        # Keep the configured indicator order
+        for series_id, config in FRED_INDICATORS.items():
+            if series_id in fetched:
                 results[series_id] = {
                     'config': config,
-                    'data': data
+                    'data': fetched[series_id]
                 }
-                print(f"[FRED] Got {len(data)} observations for {series_id}")
 
         print(f"[FRED] Complete! Fetched {len(results)}/{total} indicators.")
         return results
@@ -130,7 +243,7 @@ class FredFetcher:
 
         if indicators_to_store:
             total_stored = database.save_fred_indicators_bulk(indicators_to_store)
-            logger.info(f"Stored {total_stored} indicator observations")
+            logger.info("Stored %d indicator observations", total_stored)
 
         return total_stored
 
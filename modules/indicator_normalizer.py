@@ -3,51 +3,119 @@ Indicator Normalizer
 Normalizes economic indicators to 0-100 health scores based on their characteristics.
 """
 import logging
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from typing import Optional
-from statistics import mean, stdev
 
-from config import FRED_INDICATORS
+import numpy as np
+
+from config import FRED_INDICATOR_SPECS
 import database
 
 logger = logging.getLogger(__name__)
 
 
+_EMPTY = np.empty(0, dtype=np.float64)
+_EMPTY_HISTORY = {'dates': np.empty(0, dtype=str), 'values': _EMPTY, 'window_sorted': _EMPTY}
+
+
+@lru_cache(maxsize=4)
+def _load_histories(years: int, as_of: tuple, today: str) -> dict:
+    """
+    All series histories from one bulk query, shared across normalizer instances.
+    Returns {series_id: {'dates': observation dates, 'values': chronological
+    values, 'window_sorted': sorted values inside the percentile window}}.
+    `as_of` (latest stored observation per series) and `today` (the window is
+    relative to 'now') are only cache keys: new data or a new day misses.
+    """
+    histories = {}
+    for series_id, rows in database.get_fred_indicator_histories(years).items():
+        values = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+        window_sorted = np.sort(values[np.fromiter((r[2] for r in rows), dtype=bool, count=len(rows))])
+        values.flags.writeable = False  # shared between callers
+        window_sorted.flags.writeable = False
+        dates = np.array([r[0] for r in rows], dtype=str)
+        dates.flags.writeable = False
+        histories[series_id] = {'dates': dates, 'values': values, 'window_sorted': window_sorted}
+    return histories
+
+
+def _percentile_rank(sorted_history: np.ndarray, value: float) -> float:
+    """Percentile rank (0-100) of value: share of history strictly below it."""
+    if sorted_history.size == 0:
+        return 50.0  # Default to middle if no history
+    # Binary search on the sorted history: index = count of values < value
+    return (int(np.searchsorted(sorted_history, value, side='left')) / sorted_history.size) * 100
+
+
+def compute_all_percentiles(latest_values: dict, histories: dict) -> dict:
+    """
+    Percentile ranks for many indicators in one pass.
+    latest_values is {series_id: value}, histories is {series_id: sorted array}.
+    """
+    return {
+        series_id: _percentile_rank(histories.get(series_id, _EMPTY), value)
+        for series_id, value in latest_values.items()
+    }
+
+
 class IndicatorNormalizer:
     """Normalizes economic indicators to health scores."""
 
     def __init__(self):
-        self.history_cache = {}
+        self._as_of = {}  # series_id -> latest observation_date
+        self._as_of_key = ()
+        # direction -> normalizer(value, series_id, percentile, spec)
+        self._dispatch = {
+            'higher_better': lambda v, sid, pct, spec: self.normalize_higher_better(v, sid, pct),
+            'lower_better': lambda v, sid, pct, spec: self.normalize_lower_better(v, sid, pct),
+            'optimal_range': lambda v, sid, pct, spec: self.normalize_optimal_range(
+                v, sid, spec.optimal_low, spec.optimal_high),
+            'stable': lambda v, sid, pct, spec: self.normalize_stable(v, sid),
+            'moderate_growth': lambda v, sid, pct, spec: self.normalize_moderate_growth(v, sid),
+            'context': lambda v, sid, pct, spec: self.normalize_context(v, sid, pct),
+        }
+
+    def _set_as_of(self, as_of: dict):
+        """Record latest observation dates; they key the shared history cache."""
+        self._as_of = as_of
+        self._as_of_key = tuple(sorted((sid, d) for sid, d in as_of.items() if d))
+
+    def _get_history(self, series_id: str, years: int = 10) -> dict:
+        """Cached history entry for a series (empty arrays if none stored)."""
+        if series_id not in self._as_of:
+            self._as_of.update(
+                (sid, row['observation_date'])
+                for sid, row in database.get_latest_fred_indicators().items()
+            )
+            self._as_of.setdefault(series_id, None)  # no rows yet: don't re-query
+            self._set_as_of(self._as_of)
+        histories = _load_histories(years, self._as_of_key, date.today().isoformat())
+        return histories.get(series_id) or _EMPTY_HISTORY
 
-    def get_historical_values(self, series_id: str, years: int = 10) -> list:
-        """Get historical values for an indicator."""
-        if series_id not in self.history_cache:
-            history = database.get_fred_indicator_history(series_id, years)
-            self.history_cache[series_id] = [h['value'] for h in history if h['value'] is not None]
-        return self.history_cache[series_id]
+    def get_historical_values(self, series_id: str, years: int = 10) -> np.ndarray:
+        """Get historical values for an indicator, sorted ascending."""
+        return self._get_history(series_id, years)['window_sorted']
 
     def calculate_percentile(self, value: float, series_id: str) -> float:
         """Calculate percentile rank (0-100) of value in historical distribution."""
-        history = self.get_historical_values(series_id)
-        if not history:
-            return 50.0  # Default to middle if no history
-
-        count_below = sum(1 for v in history if v < value)
-        percentile = (count_below / len(history)) * 100
-        return percentile
+        return _percentile_rank(self.get_historical_values(series_id), value)
 
     def calculate_trend(self, series_id: str, lookback_months: int = 3) -> str:
         """Calculate trend based on recent direction."""
-        from datetime import datetime, timedelta
         start_date = (datetime.now() - timedelta(days=lookback_months * 30)).strftime('%Y-%m-%d')
-        history = database.get_fred_indicator(series_id, start_date=start_date)
 
-        if len(history) < 2:
+        # Slice the cached history at the first observation on/after start_date
+        entry = self._get_history(series_id)
+        recent = entry['values'][np.searchsorted(entry['dates'], start_date, side='left'):]
+
+        if len(recent) < 2:
             return 'stable'
 
         # Compare first third to last third
-        third = max(1, len(history) // 3)
-        early_avg = mean([h['value'] for h in history[:third]])
-        late_avg = mean([h['value'] for h in history[-third:]])
+        third = max(1, len(recent) // 3)
+        early_avg = float(recent[:third].sum()) / third
+        late_avg = float(recent[-third:].sum()) / third
 
         change_pct = ((late_avg - early_avg) / early_avg) * 100 if early_avg != 0 else 0
 
@@ -57,14 +125,18 @@ class IndicatorNormalizer:
             return 'deteriorating'
         return 'stable'
 
-    def normalize_higher_better(self, value: float, series_id: str) -> float:
+    def normalize_higher_better(self, value: float, series_id: str,
+                                percentile: Optional[float] = None) -> float:
         """Higher values are healthier (e.g., GDP, payrolls)."""
-        percentile = self.calculate_percentile(value, series_id)
+        if percentile is None:
+            percentile = self.calculate_percentile(value, series_id)
         return percentile
 
-    def normalize_lower_better(self, value: float, series_id: str) -> float:
+    def normalize_lower_better(self, value: float, series_id: str,
+                               percentile: Optional[float] = None) -> float:
         """Lower values are healthier (e.g., unemployment, VIX)."""
-        percentile = self.calculate_percentile(value, series_id)
+        if percentile is None:
+            percentile = self.calculate_percentile(value, series_id)
         return 100 - percentile
 
     def normalize_optimal_range(self, value: float, series_id: str,
@@ -82,11 +154,11 @@ class IndicatorNormalizer:
 
         # Outside optimal range
         history = self.get_historical_values(series_id)
-        if not history:
+        if history.size == 0:
             return 50.0
 
-        hist_min = min(history)
-        hist_max = max(history)
+        hist_min = float(history[0])
+        hist_max = float(history[-1])
 
         if value < optimal_low:
             # Below optimal
@@ -106,25 +178,20 @@ class IndicatorNormalizer:
         Stable/moderate change is healthiest (e.g., PPI).
         Calculate based on month-over-month change rate.
         """
-        history = database.get_fred_indicator(series_id)
+        history = self._get_history(series_id)['values']
         if len(history) < 2:
             return 50.0
 
-        # Calculate recent changes
-        values = [h['value'] for h in history[-12:]]  # Last 12 observations
-        if len(values) < 2:
-            return 50.0
-
-        changes = []
-        for i in range(1, len(values)):
-            if values[i-1] != 0:
-                pct_change = ((values[i] - values[i-1]) / values[i-1]) * 100
-                changes.append(abs(pct_change))
+        # Calculate recent changes over the last 12 observations
+        values = history[-12:]
+        prev, curr = values[:-1], values[1:]
+        nonzero = prev != 0
+        changes = np.abs((curr[nonzero] - prev[nonzero]) / prev[nonzero] * 100)
 
-        if not changes:
+        if changes.size == 0:
             return 50.0
 
-        avg_change = mean(changes)
+        avg_change = float(changes.mean())
 
         # Lower volatility = higher score
         if avg_change < 0.5:
@@ -138,12 +205,14 @@ class IndicatorNormalizer:
         else:
             return max(0, 30 - (avg_change - 5) * 5)
 
-    def normalize_context(self, value: float, series_id: str) -> float:
+    def normalize_context(self, value: float, series_id: str,
+                          percentile: Optional[float] = None) -> float:
         """
         Context-dependent indicators (e.g., Fed Funds rate).
         Use moderate percentile - not too high, not too low.
         """
-        percentile = self.calculate_percentile(value, series_id)
+        if percentile is None:
+            percentile = self.calculate_percentile(value, series_id)
         # Favor middle values - extreme highs or lows are less healthy
         if 30 <= percentile <= 70:
             return 70 + (10 - abs(percentile - 50) / 2)
@@ -156,13 +225,13 @@ class IndicatorNormalizer:
         """
         Moderate growth is healthiest (e.g., M2 money supply).
         """
-        history = database.get_fred_indicator(series_id)
+        history = self._get_history(series_id)['values']
         if len(history) < 13:  # Need at least 13 months for YoY
             return 50.0
 
         # Calculate year-over-year growth
-        current = history[-1]['value']
-        year_ago = history[-13]['value'] if len(history) >= 13 else history[0]['value']
+        current = float(history[-1])
+        year_ago = float(history[-13])
 
         if year_ago == 0:
             return 50.0
@@ -181,30 +250,24 @@ class IndicatorNormalizer:
         else:
             return max(20, 70 - (yoy_growth - 10) * 3)
 
-    def normalize_indicator(self, series_id: str, value: float) -> dict:
+    def normalize_indicator(self, series_id: str, value: float,
+                            percentile: Optional[float] = None) -> dict:
         """
         Normalize an indicator to a 0-100 health score.
         Returns dict with health_score, trend, percentile.
+        A precomputed percentile (see compute_all_percentiles) skips the lookup.
         """
-        if series_id not in FRED_INDICATORS:
+        spec = FRED_INDICATOR_SPECS.get(series_id)
+        if spec is None:
             return {'health_score': 50, 'trend': 'stable', 'percentile': 50}
 
-        config = FRED_INDICATORS[series_id]
-        direction = config.get('direction', 'context')
-
-        if direction == 'higher_better':
-            health_score = self.normalize_higher_better(value, series_id)
-        elif direction == 'lower_better':
-            health_score = self.normalize_lower_better(value, series_id)
-        elif direction == 'optimal_range':
-            optimal = config.get('optimal', (0, 100))
-            health_score = self.normalize_optimal_range(value, series_id, optimal[0], optimal[1])
-        elif direction == 'stable':
-            health_score = self.normalize_stable(value, series_id)
-        elif direction == 'moderate_growth':
-            health_score = self.normalize_moderate_growth(value, series_id)
-        else:  # context
-            health_score = self.normalize_context(value, series_id)
+        direction = spec.direction
+
+        # One percentile lookup, shared by the scorer and the result
+        if percentile is None:
+            percentile = self.calculate_percentile(value, series_id)
+        normalize = self._dispatch.get(direction, self._dispatch['context'])
+        health_score = normalize(value, series_id, percentile, spec)
 
         # Calculate trend
         trend = self.calculate_trend(series_id)
@@ -217,8 +280,6 @@ class IndicatorNormalizer:
             elif trend == 'deteriorating':
                 trend = 'improving'
 
-        percentile = self.calculate_percentile(value, series_id)
-
         return {
             'health_score': round(max(0, min(100, health_score)), 1),
             'trend': trend,
@@ -231,36 +292,48 @@ class IndicatorNormalizer:
         Returns dict of {series_id: {health_score, trend, percentile}}.
         """
         latest = database.get_latest_fred_indicators()
+        self._set_as_of({sid: data['observation_date'] for sid, data in latest.items()})
         results = {}
+        scores = []
+
+        percentiles = compute_all_percentiles(
+            {series_id: data['value'] for series_id, data in latest.items()},
+            {series_id: self.get_historical_values(series_id) for series_id in latest}
+        )
 
         for series_id, data in latest.items():
             value = data['value']
             observation_date = data['observation_date']
 
-            normalized = self.normalize_indicator(series_id, value)
+            normalized = self.normalize_indicator(series_id, value, percentiles[series_id])
+            spec = FRED_INDICATOR_SPECS.get(series_id)
             results[series_id] = {
                 **normalized,
                 'value': value,
                 'observation_date': observation_date,
-                'name': FRED_INDICATORS.get(series_id, {}).get('name', series_id),
-                'category': FRED_INDICATORS.get(series_id, {}).get('category', 'other')
+                'name': spec.name if spec else series_id,
+                'category': spec.category if spec else 'other'
             }
 
-            # Store in database
-            database.save_indicator_health_score(
-                series_id=series_id,
-                observation_date=observation_date,
-                raw_value=value,
-                health_score=normalized['health_score'],
-                trend=normalized['trend'],
-                percentile=normalized['percentile']
-            )
+            scores.append({
+                'series_id': series_id,
+                'observation_date': observation_date,
+                'raw_value': value,
+                'health_score': normalized['health_score'],
+                'trend': normalized['trend'],
+                'percentile': normalized['percentile']
+            })
+
+        # Store in database, one transaction for the whole pass
+        if scores:
+            database.save_indicator_health_scores_bulk(scores)
 
         return results
 
     def clear_cache(self):
         """Clear the history cache."""
-        self.history_cache = {}
+        self._set_as_of({})
+        _load_histories.cache_clear()
 
 
 # Global instance
@@ -3,10 +3,57 @@ Market Analyzer Module
 Analyzes market conditions, regime detection, and sentiment-market correlation.
 """
 
-import statistics
+import math
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
 from datetime import datetime, timedelta
+
+import numpy as np
+
 import database
 from modules.economic_health import get_economic_health
+from modules.sentiment_aggregator import get_market_sentiment_summary
+
+# Process-local copy of the last market context, reused for CONTEXT_TTL_SECONDS
+CONTEXT_TTL_SECONDS = 60
+_CTX_CACHE = {'date': None, 'ts': 0.0, 'val': None}
+
+_DIRECTION_SCORES = {'bullish': 0.5, 'bearish': -0.5, 'neutral': 0}
+
+
+def _above(x):
+    """Smallest float > x: turns a 'value <= x' band edge into a bisect_right threshold."""
+    return math.nextafter(x, math.inf)
+
+
+# Mood score ladders for bisect_right: band i is thresholds[i-1] <= value < thresholds[i]
+_VOL_THRESHOLDS = (_above(12), _above(15), 20, 25)
+_VOL_DELTAS = (15, 5, 0, -10, -15)           # low vol = complacency/greed, high vol = fear
+_CHANGE_THRESHOLDS = (_above(-2), _above(-0.5), 0.5, 2)
+_CHANGE_DELTAS = (-12, -6, 0, 6, 12)
+_DRAWDOWN_THRESHOLDS = (_above(-10), _above(-5), _above(-2))
+_DRAWDOWN_DELTAS = (-10, -5, 0, 5)
+_ECON_THRESHOLDS = (_above(40), 70)
+_ECON_DELTAS = (-5, 0, 5)                    # weak economy = fear, strong = confidence
+
+# Mood labels use bisect_left: score <= 25 is Extreme Fear, etc.
+_MOOD_LABEL_BOUNDS = (25, 45, 55, 75)
+_MOOD_LABELS = ('Extreme Fear', 'Fear', 'Neutral', 'Greed', 'Extreme Greed')
+
+
+def _realized_vol(closes, window=20):
+    """
+    Annualized realized volatility (%) of the last `window` daily returns.
+    NaN closes drop the returns they touch; None if fewer than 5 remain.
+    """
+    tail = closes[-window - 1:]
+    returns = np.diff(tail) / tail[:-1]
+    returns = returns[np.isfinite(returns)]
+    if returns.size < 5:
+        return None
+    # Annualize (252 trading days)
+    return float(returns.std(ddof=1) * np.sqrt(252) * 100)
 
 
 class MarketAnalyzer:
@@ -41,13 +88,13 @@ class MarketAnalyzer:
         }
 
         # Get market data
-        sp500_data = database.get_market_data('^GSPC')
-        nasdaq_data = database.get_market_data('^IXIC')
+        sp500_data = database.get_market_data_columns('^GSPC')
+        nasdaq_data = database.get_market_data_columns('^IXIC')
 
-        if sp500_data:
+        if len(sp500_data):
             context.update(self._analyze_index(sp500_data, 'sp500'))
 
-        if nasdaq_data:
+        if len(nasdaq_data):
             nasdaq_analysis = self._analyze_index(nasdaq_data, 'nasdaq')
             context['nasdaq_pct_change'] = nasdaq_analysis.get('nasdaq_pct_change', 0)
 
@@ -63,19 +110,24 @@ class MarketAnalyzer:
             context['bullish_ratio'] = sentiment_summary.get('bullish_ratio', 0.5)
             context['sector_sentiment'] = self._get_sector_sentiment()
 
-        # Get economic health
-        try:
-            economic_health = get_economic_health()
-            if economic_health:
-                context['economic_health'] = {
-                    'overall_score': economic_health.get('overall_score'),
-                    'regime': economic_health.get('regime'),
-                    'recession_probability': economic_health.get('recession_probability'),
-                    'recession_warning': economic_health.get('recession_warning', False)
-                }
-                context['economic_regime'] = economic_health.get('regime')
-        except Exception:
-            pass  # Continue without economic data
+        # Get economic health (daily data: reuse today's from the cached context)
+        cached = _CTX_CACHE['val']
+        if cached and _CTX_CACHE['date'] == context['date'] and cached.get('economic_health'):
+            context['economic_health'] = cached['economic_health']
+            context['economic_regime'] = cached.get('economic_regime')
+        else:
+            try:
+                economic_health = get_economic_health()
+                if economic_health:
+                    context['economic_health'] = {
+                        'overall_score': economic_health.get('overall_score'),
+                        'regime': economic_health.get('regime'),
+                        'recession_probability': economic_health.get('recession_probability'),
+                        'recession_warning': economic_health.get('recession_warning', False)
+                    }
+                    context['economic_regime'] = economic_health.get('regime')
+            except Exception:
+                pass  # Continue without economic data
 
         # Save context
         database.save_market_context(
@@ -96,7 +148,7 @@ class MarketAnalyzer:
         Analyze a market index.
 
         Args:
-            data: List of OHLCV dicts
+            data: database.OHLCVColumns, ordered by date
             prefix: Prefix for result keys
 
         Returns:
@@ -104,52 +156,39 @@ class MarketAnalyzer:
         """
         result = {}
 
-        if not data or len(data) < 2:
+        if data is None or len(data) < 2:
             return result
 
-        # Sort by date
-        data = sorted(data, key=lambda x: x.get('date', ''))
-
-        # Get recent data
-        recent = data[-1] if data else {}
-        prev = data[-2] if len(data) >= 2 else recent
+        # Missing or zero closes are treated as absent (NaN)
+        closes = np.where(data.close == 0, np.nan, data.close)
+        recent_close = float(closes[-1])
+        prev_close = float(closes[-2])
+        current_close = 0.0 if np.isnan(recent_close) else recent_close
 
         # Daily change
-        if recent.get('close') and prev.get('close'):
-            pct_change = ((recent['close'] - prev['close']) / prev['close']) * 100
+        if not np.isnan(recent_close) and not np.isnan(prev_close):
+            pct_change = ((recent_close - prev_close) / prev_close) * 100
             result[f'{prefix}_pct_change'] = round(pct_change, 2)
 
         # Calculate volatility (20-day realized volatility)
         if len(data) >= 20:
-            returns = []
-            for i in range(1, min(21, len(data))):
-                if data[-i].get('close') and data[-i-1].get('close'):
-                    ret = (data[-i]['close'] - data[-i-1]['close']) / data[-i-1]['close']
-                    returns.append(ret)
-
-            if len(returns) >= 5:
-                try:
-                    stdev = statistics.stdev(returns)
-                    # Annualize (252 trading days)
-                    volatility = stdev * (252 ** 0.5) * 100
-                    result['volatility_level'] = round(volatility, 2)
-                except statistics.StatisticsError:
-                    pass
+            volatility = _realized_vol(closes)
+            if volatility is not None:
+                result['volatility_level'] = round(volatility, 2)
 
         # Check for correction (drop from recent high)
         if len(data) >= 60:
-            recent_high = max(d.get('high', 0) for d in data[-60:])
-            current = recent.get('close', 0)
+            recent_high = float(np.nan_to_num(data.high[-60:]).max())
             if recent_high > 0:
-                drawdown = ((current - recent_high) / recent_high) * 100
+                drawdown = ((current_close - recent_high) / recent_high) * 100
                 result[f'{prefix}_drawdown'] = round(drawdown, 2)
 
         # 200-day moving average check
         if len(data) >= 200:
-            closes = [d.get('close', 0) for d in data[-200:] if d.get('close')]
-            if closes:
-                ma200 = sum(closes) / len(closes)
-                current_close = recent.get('close', 0)
+            last_200 = closes[-200:]
+            valid = last_200[~np.isnan(last_200)]
+            if valid.size:
+                ma200 = float(valid.mean())
                 result[f'{prefix}_above_ma200'] = current_close > ma200
 
         return result
@@ -195,34 +234,15 @@ class MarketAnalyzer:
 
         # Volatility factor (30%)
         volatility = context.get('volatility_level', 15)
-        if volatility <= 12:
-            score += 15  # Low vol = complacency/greed
-        elif volatility <= 15:
-            score += 5
-        elif volatility >= 25:
-            score -= 15  # High vol = fear
-        elif volatility >= 20:
-            score -= 10
+        score += _VOL_DELTAS[bisect_right(_VOL_THRESHOLDS, volatility)]
 
         # Market momentum factor (25%)
         sp500_change = context.get('sp500_pct_change', 0)
-        if sp500_change >= 2:
-            score += 12
-        elif sp500_change >= 0.5:
-            score += 6
-        elif sp500_change <= -2:
-            score -= 12
-        elif sp500_change <= -0.5:
-            score -= 6
+        score += _CHANGE_DELTAS[bisect_right(_CHANGE_THRESHOLDS, sp500_change)]
 
         # Drawdown factor (20%)
         drawdown = context.get('sp500_drawdown', 0)
-        if drawdown <= -10:
-            score -= 10
-        elif drawdown <= -5:
-            score -= 5
-        elif drawdown > -2:
-            score += 5
+        score += _DRAWDOWN_DELTAS[bisect_right(_DRAWDOWN_THRESHOLDS, drawdown)]
 
         # Sentiment distribution factor (25%)
         bullish_ratio = context.get('bullish_ratio', 0.5)
@@ -232,13 +252,9 @@ class MarketAnalyzer:
         economic_health = context.get('economic_health')
         if economic_health:
             econ_score = economic_health.get('overall_score', 50)
-            econ_regime = economic_health.get('regime', '')
 
             # Adjust mood based on economic health
-            if econ_score >= 70:
-                score += 5  # Strong economy = confidence
-            elif econ_score <= 40:
-                score -= 5  # Weak economy = fear
+            score += _ECON_DELTAS[bisect_right(_ECON_THRESHOLDS, econ_score)]
 
             # Recession warning adds fear
             if economic_health.get('recession_warning'):
@@ -248,16 +264,14 @@ class MarketAnalyzer:
 
     def _get_sentiment_summary(self):
         """Get sentiment distribution from tracked tickers."""
-        from modules.sentiment_aggregator import get_market_sentiment_summary
         return get_market_sentiment_summary()
 
     def _get_sector_sentiment(self):
         """Calculate sentiment by sector."""
-        all_sentiments = database.get_all_ticker_sentiments()
         news = database.get_news_with_signals()
 
-        sector_scores = {}
-        sector_counts = {}
+        # sector -> [score sum, count], accumulated in one pass over the news
+        totals = defaultdict(lambda: [0.0, 0])
 
         # Aggregate from news (which has sector info)
         for item in news:
@@ -265,27 +279,13 @@ class MarketAnalyzer:
             if not sector:
                 continue
 
-            tickers = item.get('tickers', [])
-            direction = item.get('direction', 'neutral')
-
             # Convert direction to score
-            score = {'bullish': 0.5, 'bearish': -0.5, 'neutral': 0}.get(direction, 0)
-
-            if sector not in sector_scores:
-                sector_scores[sector] = 0
-                sector_counts[sector] = 0
-
-            sector_scores[sector] += score
-            sector_counts[sector] += 1
+            entry = totals[sector]
+            entry[0] += _DIRECTION_SCORES.get(item.get('direction', 'neutral'), 0)
+            entry[1] += 1
 
         # Calculate averages
-        result = {}
-        for sector in sector_scores:
-            if sector_counts[sector] > 0:
-                avg = sector_scores[sector] / sector_counts[sector]
-                result[sector] = round(avg, 4)
-
-        return result
+        return {sector: round(total / count, 4) for sector, (total, count) in totals.items()}
 
     def is_correction(self, threshold=-5):
         """
@@ -338,30 +338,46 @@ class MarketAnalyzer:
 
     def get_mood_label(self, score):
         """Get human-readable mood label."""
-        if score <= 25:
-            return 'Extreme Fear'
-        elif score <= 45:
-            return 'Fear'
-        elif score <= 55:
-            return 'Neutral'
-        elif score <= 75:
-            return 'Greed'
-        else:
-            return 'Extreme Greed'
+        return _MOOD_LABELS[bisect_left(_MOOD_LABEL_BOUNDS, score)]
+
+
+def _remember_context(context):
+    """Store a context in the process-local TTL cache."""
+    global _CTX_CACHE
+    _CTX_CACHE = {
+        'date': datetime.now().strftime('%Y-%m-%d'),
+        'ts': time.monotonic(),
+        'val': context
+    }
+
+
+def invalidate_market_context():
+    """Drop the process-local context cache (e.g. after an economic data refresh)."""
+    global _CTX_CACHE
+    _CTX_CACHE = {'date': None, 'ts': 0.0, 'val': None}
 
 
 def analyze_market():
     """Convenience function to analyze market context."""
     analyzer = MarketAnalyzer()
-    return analyzer.analyze_market_context()
+    context = analyzer.analyze_market_context()
+    _remember_context(context)
+    return context
 
 
 def get_market_context():
     """Get current market context (cached or fresh)."""
+    entry = _CTX_CACHE
+    if (entry['val'] is not None
+            and entry['date'] == datetime.now().strftime('%Y-%m-%d')
+            and time.monotonic() - entry['ts'] < CONTEXT_TTL_SECONDS):
+        return dict(entry['val'])  # callers add keys (e.g. labels) to the result
+
     cached = database.get_latest_market_context()
     if cached:
-        return cached
-    return analyze_market()
+        _remember_context(cached)
+        return dict(cached)
+    return dict(analyze_market())
 
 
 def is_buy_opportunity():
@@ -1,18 +1,31 @@
 import sys
 import os
+import time
 from datetime import datetime, timedelta
 
+import numpy as np
+
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
 import database
 
-try:
-    import yfinance as yf
-except ImportError:
-    print("yfinance not installed. Run: pip install yfinance")
-    yf = None
+# yfinance pulls in pandas/numpy/lxml; import it on first fetch, not at app startup
+_yf = None
+
+
+def _get_yf():
+    """Return the yfinance module, importing it on first use (None if missing)."""
+    global _yf
+    if _yf is None:
+        try:
+            import yfinance
+            _yf = yfinance
+        except ImportError:
+            print("yfinance not installed. Run: pip install yfinance")
+            _yf = False
+    return _yf or None
 
 INDICES = {
     '^IXIC': 'NASDAQ Composite',
@@ -20,8 +33,112 @@ INDICES = {
     '^DJI': 'Dow Jones Industrial Average'
 }
 
+# Yahoo rejects overly long multi-symbol URLs; batch downloads are split into chunks
+DOWNLOAD_CHUNK_SIZE = 20
+
+# Yahoo answers bursts with HTTP 429; back off 2s, 4s before giving up
+YF_RETRIES = 3
+YF_BACKOFF_SECONDS = 2
+
+def _is_rate_limited(exc):
+    """True for Yahoo 429s (yfinance's YFRateLimitError, or an HTTP error with status 429)."""
+    if type(exc).__name__ == 'YFRateLimitError':
+        return True
+    response = getattr(exc, 'response', None)
+    return getattr(response, 'status_code', None) == 429
+
+def _with_backoff(fn, *args, **kwargs):
+    """Call a yfinance function, retrying rate-limit errors with exponential backoff."""
+    for attempt in range(YF_RETRIES):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == YF_RETRIES - 1 or not _is_rate_limited(e):
+                raise
+            delay = YF_BACKOFF_SECONDS * 2 ** attempt
+            print(f"Yahoo rate limit hit, retrying in {delay}s...")
+            time.sleep(delay)
+
+def _nullable(series):
+    """Column -> list with 0 and NaN as None, like the old per-row truthiness checks."""
+    series = series.where(series != 0)
+    return series.astype(object).where(series.notna(), None).tolist()
+
+def _frame_to_tuples(hist, prev_close=None):
+    """
+    Convert a yfinance OHLCV DataFrame into market_indices rows, one column at a time.
+    Rows are (date, open, high, low, close, volume, pct_change) tuples, ready for executemany.
+    """
+    if hist.empty:
+        return []
+
+    close = hist['Close']
+    # pct_change against the previous raw close; the first row uses prev_close
+    prev = close.shift(1)
+    prev.iloc[0] = prev_close if prev_close else float('nan')
+    valid = prev.notna() & (prev != 0) & close.notna() & (close != 0)
+    pct_change = ((close - prev) / prev * 100).round(4).where(valid)
+
+    volume = hist['Volume']
+    has_volume = volume.notna() & (volume != 0)
+
+    return list(zip(
+        hist.index.strftime('%Y-%m-%d').tolist(),
+        _nullable(hist['Open'].round(2)),
+        _nullable(hist['High'].round(2)),
+        _nullable(hist['Low'].round(2)),
+        _nullable(close.round(2)),
+        # Truncate like the old int(row['Volume']); Int64 refuses fractional floats
+        np.trunc(volume).where(has_volume).astype('Int64').astype(object).where(has_volume, None).tolist(),
+        pct_change.astype(object).where(valid, None).tolist()
+    ))
+
+def _frame_to_rows(hist, prev_close=None):
+    """Same as _frame_to_tuples, as dicts (the shape fetch_index_history returns)."""
+    return [
+        {'date': d, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v, 'pct_change': p}
+        for d, o, h, l, c, v, p in _frame_to_tuples(hist, prev_close)
+    ]
+
+def _download_frames(yf, symbols, **kwargs):
+    """
+    Download several symbols with yf.download (one request per chunk); returns {symbol: DataFrame}.
+    yf.download never raises: per-symbol failures (429s included) come back as missing
+    columns, so those symbols are fetched again one by one with backoff.
+    """
+    frames = {}
+    for i in range(0, len(symbols), DOWNLOAD_CHUNK_SIZE):
+        chunk = symbols[i:i + DOWNLOAD_CHUNK_SIZE]
+        df = yf.download(chunk, group_by='ticker', auto_adjust=True,
+                         threads=False, progress=False, **kwargs)
+        if df is None or df.empty:
+            continue
+        for symbol in chunk:
+            if df.columns.nlevels > 1:
+                if symbol not in df.columns.get_level_values(0):
+                    continue
+                sub = df[symbol]
+            else:
+                sub = df
+            sub = sub.dropna(how='all')
+            if not sub.empty:
+                frames[symbol] = sub
+
+    for symbol in symbols:
+        if symbol in frames:
+            continue
+        try:
+            hist = _with_backoff(yf.Ticker(symbol).history, **kwargs).dropna(how='all')
+        except Exception as e:
+            print(f"Error fetching {symbol}: {e}")
+            continue
+        if not hist.empty:
+            frames[symbol] = hist
+    return frames
+
 def fetch_index_history(symbol, period='max'):
     """Fetch historical data for an index using yfinance."""
+    yf = _get_yf()
     if not yf:
         print("yfinance not available")
         return []
@@ -29,31 +146,13 @@ def fetch_index_history(symbol, period='max'):
     print(f"Fetching {INDICES.get(symbol, symbol)} data...")
     try:
         ticker = yf.Ticker(symbol)
-        hist = ticker.history(period=period)
+        hist = _with_backoff(ticker.history, period=period)
 
         if hist.empty:
             print(f"No data returned for {symbol}")
             return []
 
-        data_rows = []
-        prev_close = None
-        for date, row in hist.iterrows():
-            date_str = date.strftime('%Y-%m-%d')
-            close = row['Close']
-            pct_change = None
-            if prev_close and close:
-                pct_change = round(((close - prev_close) / prev_close) * 100, 4)
-
-            data_rows.append({
-                'date': date_str,
-                'open': round(row['Open'], 2) if row['Open'] else None,
-                'high': round(row['High'], 2) if row['High'] else None,
-                'low': round(row['Low'], 2) if row['Low'] else None,
-                'close': round(close, 2) if close else None,
-                'volume': int(row['Volume']) if row['Volume'] else None,
-                'pct_change': pct_change
-            })
-            prev_close = close
+        data_rows = _frame_to_rows(hist)
 
         print(f"Fetched {len(data_rows)} records for {symbol}")
         return data_rows
@@ -73,10 +172,15 @@ def fetch_incremental(symbol):
         print(f"{symbol}: Already up to date")
         return []
 
+    yf = _get_yf()
+    if not yf:
+        print("yfinance not available")
+        return []
+
     print(f"Fetching {symbol} from {start_date.strftime('%Y-%m-%d')}...")
     try:
         ticker = yf.Ticker(symbol)
-        hist = ticker.history(start=start_date.strftime('%Y-%m-%d'))
+        hist = _with_backoff(ticker.history, start=start_date.strftime('%Y-%m-%d'))
 
         if hist.empty:
             return []
@@ -84,34 +188,15 @@ def fetch_incremental(symbol):
         last_known = database.get_market_data(symbol)
         prev_close = last_known[-1]['close'] if last_known else None
 
-        data_rows = []
-        for date, row in hist.iterrows():
-            date_str = date.strftime('%Y-%m-%d')
-            close = row['Close']
-            pct_change = None
-            if prev_close and close:
-                pct_change = round(((close - prev_close) / prev_close) * 100, 4)
-
-            data_rows.append({
-                'date': date_str,
-                'open': round(row['Open'], 2) if row['Open'] else None,
-                'high': round(row['High'], 2) if row['High'] else None,
-                'low': round(row['Low'], 2) if row['Low'] else None,
-                'close': round(close, 2) if close else None,
-                'volume': int(row['Volume']) if row['Volume'] else None,
-                'pct_change': pct_change
-            })
-            prev_close = close
-
-        return data_rows
+        return _frame_to_rows(hist, prev_close)
     except Exception as e:
         print(f"Error fetching incremental {symbol}: {e}")
         return []
 
-def refresh_all_indices():
-    """Refresh data for all indices."""
+def _refresh_each(symbols):
+    """Per-symbol refresh (one Yahoo request per index)."""
     results = {}
-    for symbol in INDICES:
+    for symbol in symbols:
         count = database.get_market_data_count(symbol)
         if count == 0:
             data = fetch_index_history(symbol, period='max')
@@ -125,6 +210,54 @@ def refresh_all_indices():
             results[symbol] = 0
     return results
 
+def refresh_all_indices():
+    """Refresh data for all indices, downloading them together with yf.download."""
+    yf = _get_yf()
+    if not yf:
+        print("yfinance not available")
+        return {symbol: 0 for symbol in INDICES}
+
+    # Split indices into empty ones (full history) and ones needing new rows only
+    full, incremental = [], {}
+    for symbol in INDICES:
+        latest_date = database.get_latest_market_date(symbol)
+        if not latest_date:
+            full.append(symbol)
+            continue
+        start_date = datetime.strptime(latest_date, '%Y-%m-%d') + timedelta(days=1)
+        if start_date.date() > datetime.now().date():
+            print(f"{symbol}: Already up to date")
+            continue
+        incremental[symbol] = start_date.strftime('%Y-%m-%d')
+
+    results = {symbol: 0 for symbol in INDICES}
+    try:
+        full_frames = _download_frames(yf, full, period='max') if full else {}
+        # One request from the earliest start; each symbol is trimmed to its own start below
+        new_frames = _download_frames(yf, list(incremental), start=min(incremental.values())) if incremental else {}
+    except Exception as e:
+        print(f"Batch download failed ({e}), fetching indices one by one")
+        return _refresh_each(INDICES)
+
+    # Tuples go straight to executemany; no per-row dicts for full histories
+    for symbol, hist in full_frames.items():
+        data = _frame_to_tuples(hist)
+        print(f"Fetched {len(data)} records for {symbol}")
+        if data:
+            results[symbol] = database.save_market_data_rows(symbol, data)
+
+    for symbol, hist in new_frames.items():
+        hist = hist[hist.index.strftime('%Y-%m-%d') >= incremental[symbol]]
+        if hist.empty:
+            continue
+        last_known = database.get_market_data(symbol)
+        prev_close = last_known[-1]['close'] if last_known else None
+        data = _frame_to_tuples(hist, prev_close)
+        if data:
+            results[symbol] = database.save_market_data_rows(symbol, data)
+
+    return results
+
 def ensure_data_loaded(symbol):
     """Ensure we have data for a symbol, fetch if empty."""
     count = database.get_market_data_count(symbol)
@@ -9,6 +9,8 @@ Weighted composite:
 """
 
 import math
+from bisect import bisect_right
+from collections import Counter
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from statistics import mean, stdev
@@ -17,6 +19,48 @@ import database
 from modules.economic_health import get_economic_health
 
 
+# Score band edges (each edge belongs to the band above it) and the
+# recommendation for each band, from lowest to highest score
+_RECOMMENDATION_BOUNDS = (-60, -30, 30, 60)
+_RECOMMENDATIONS = (
+    {
+        'action': 'AVOID',
+        'color': '#ef4444',
+        'bg_color': '#fee2e2',
+        'description': 'Poor conditions - high risk of loss',
+        'short_desc': 'High risk'
+    },
+    {
+        'action': 'CAUTION',
+        'color': '#f97316',
+        'bg_color': '#ffedd5',
+        'description': 'Unfavorable conditions - proceed carefully',
+        'short_desc': 'Unfavorable'
+    },
+    {
+        'action': 'HOLD',
+        'color': '#eab308',
+        'bg_color': '#fef9c3',
+        'description': 'Neutral - wait for better entry',
+        'short_desc': 'Neutral'
+    },
+    {
+        'action': 'BUY',
+        'color': '#84cc16',
+        'bg_color': '#ecfccb',
+        'description': 'Favorable conditions for buying',
+        'short_desc': 'Favorable'
+    },
+    {
+        'action': 'STRONG_BUY',
+        'color': '#22c55e',
+        'bg_color': '#dcfce7',
+        'description': 'Excellent conditions to buy',
+        'short_desc': 'Very favorable'
+    },
+)
+
+
 class MarketRecommender:
     """Statistical recommendation: Is now a good time to buy?"""
 
@@ -429,8 +473,11 @@ class MarketRecommender:
         if not ohlcv_data or len(ohlcv_data) < 20:
             return {}
 
-        # Sort by date
-        data = sorted(ohlcv_data, key=lambda x: x.get('date', ''))
+        # database.get_market_data already returns rows in date ASC order;
+        # only a reversed list needs fixing, which is O(N) instead of a sort
+        data = ohlcv_data
+        if data[0].get('date', '') > data[-1].get('date', ''):
+            data = data[::-1]
         closes = [d['close'] for d in data if d.get('close')]
 
         if len(closes) < 20:
@@ -637,46 +684,7 @@ class MarketRecommender:
 
     def _score_to_recommendation(self, score: float) -> Dict:
         """Convert composite score to actionable recommendation."""
-        if score >= 60:
-            return {
-                'action': 'STRONG_BUY',
-                'color': '#22c55e',
-                'bg_color': '#dcfce7',
-                'description': 'Excellent conditions to buy',
-                'short_desc': 'Very favorable'
-            }
-        elif score >= 30:
-            return {
-                'action': 'BUY',
-                'color': '#84cc16',
-                'bg_color': '#ecfccb',
-                'description': 'Favorable conditions for buying',
-                'short_desc': 'Favorable'
-            }
-        elif score >= -30:
-            return {
-                'action': 'HOLD',
-                'color': '#eab308',
-                'bg_color': '#fef9c3',
-                'description': 'Neutral - wait for better entry',
-                'short_desc': 'Neutral'
-            }
-        elif score >= -60:
-            return {
-                'action': 'CAUTION',
-                'color': '#f97316',
-                'bg_color': '#ffedd5',
-                'description': 'Unfavorable conditions - proceed carefully',
-                'short_desc': 'Unfavorable'
-            }
-        else:
-            return {
-                'action': 'AVOID',
-                'color': '#ef4444',
-                'bg_color': '#fee2e2',
-                'description': 'Poor conditions - high risk of loss',
-                'short_desc': 'High risk'
-            }
+        return dict(_RECOMMENDATIONS[bisect_right(_RECOMMENDATION_BOUNDS, score)])
 
     def _safe_mean(self, values: List) -> Optional[float]:
         """Calculate mean of non-None values."""
@@ -689,7 +697,6 @@ class MarketRecommender:
         if not filtered:
             return None
         # Simple majority
-        from collections import Counter
         counts = Counter(filtered)
         return counts.most_common(1)[0][0]
 
@@ -1,9 +1,23 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import feedparser
+import asyncio
+import io
 import sys
 import os
 import time
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+import xml.etree.ElementTree as ET
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+    aiohttp = None
 
 # ==========================================
 # TRUC PENTRU IMPORTURI (PATH HACK)
@@ -16,6 +30,46 @@ sys.path.append(parent_dir)
 import config
 import database
 
+FINNHUB_NEWS_URL = "https://finnhub.io/api/v1/news"
+
+# Formatul în care salvăm data publicării în tabela news
+PUB_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Câte fluxuri RSS descărcăm simultan (politețe față de servere)
+RSS_CONCURRENCY = 32
+# ...dar cel mult 4 cereri deodată către același host, ca un site lent
+# să nu ocupe toate conexiunile
+RSS_CONCURRENCY_PER_HOST = 4
+RSS_TIMEOUT_SECONDS = 10
+# Citim cel mult 2MB dintr-un flux; ne trebuie doar primele intrări
+RSS_MAX_BYTES = 2 * 1024 * 1024
+# Câte știri luăm de la fiecare sursă
+RSS_ENTRIES_PER_FEED = 5
+DC_DATE_TAG = '{http://purl.org/dc/elements/1.1/}date'
+# Știrile publicate cu până la 6 ore înainte de cea mai nouă văzută trec totuși:
+# agregatoarele adaugă târziu articole cu date mai vechi; duplicatele le oprește url-ul unic
+RSS_LATE_ENTRY_HOURS = 6
+
+# Un flux care dă eroare e reîncercat abia după 60s, 120s, ... (maxim o oră)
+RSS_RETRY_BASE_SECONDS = 30
+RSS_RETRY_MAX_SECONDS = 3600
+_feed_backoff = {}  # sursă -> (eșecuri consecutive, momentul următoarei încercări)
+
+# Unele servere RSS refuză clienții fără un User-Agent de browser
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Sesiune HTTP refolosită pentru Finnhub: păstrăm conexiunea TLS deschisă
+# între scanări, iar Retry absoarbe erorile temporare (429 / 5xx)
+_finnhub_session = requests.Session()
+_finnhub_session.headers.update(HTTP_HEADERS)
+_finnhub_session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+))
+
 # ==========================================
 # FUNCȚIA 1: FINNHUB (API)
 # ==========================================
@@ -27,26 +81,51 @@ def fetch_finnhub_news():
         print("❌ Lipsă Token Finnhub în .env")
         return 0
 
-    url = f"https://finnhub.io/api/v1/news?category=general&token={token}"
     count = 0
     try:
-        response = requests.get(url)
+        # Sincronizare incrementală: cu minId, Finnhub trimite doar știrile mai noi
+        # decât ultima văzută, deci nu mai descărcăm aceleași articole la fiecare scanare
+        params = {"category": "general"}
+        last_id = database.get_news_last_id("finnhub")
+        if last_id:
+            params["minId"] = last_id
+
+        # Token-ul merge în header, nu în URL: așa nu apare în loguri sau în mesajele de eroare
+        response = _finnhub_session.get(
+            FINNHUB_NEWS_URL,
+            params=params,
+            headers={"X-Finnhub-Token": token},
+            timeout=(2, 5)  # conectare 2s, citire 5s
+        )
         data = response.json()
         
         if isinstance(data, list):
-            for item in data[:15]: 
-                pub_date = datetime.fromtimestamp(item['datetime']).strftime('%Y-%m-%d %H:%M:%S')
-                
-                # Încercăm să luăm sursa reală din datele Finnhub (item['source'])
-                # Dacă câmpul e gol sau nu există, folosim 'Finnhub' ca rezervă.
-                real_source = item.get('source')
-                if not real_source:
-                    real_source = "Finnhub"
-                # -----------------------------
-
-                # Folosim real_source în loc de textul hardcodat "Finnhub"
-                if database.add_news_placeholder(real_source, item['headline'], item['url'], pub_date):
-                    count += 1
+            # Un element incomplet e sărit, nu mai strică tot lotul
+            rows = [
+                (
+                    # Sursa reală din datele Finnhub; dacă lipsește, 'Finnhub' ca rezervă
+                    item.get('source') or "Finnhub",
+                    item['headline'],
+                    item['url'],
+                    # time.localtime dă același rezultat ca datetime.fromtimestamp, fără obiectul datetime
+                    time.strftime(PUB_DATE_FORMAT, time.localtime(item['datetime'])),
+                )
+                for item in data[:15]
+                if isinstance(item, dict)
+                and item.get('headline') and item.get('url') and item.get('datetime')
+            ]
+
+            # O singură conexiune și un singur commit pentru toate știrile
+            counts = database.add_news_placeholders(rows)
+            if counts is None:
+                # Nimic salvat: nu mutăm cursorul, altfel știrile astea s-ar pierde
+                return 0
+            count = sum(counts.values())
+
+            # Cursorul avansează abia după ce știrile sunt în baza de date
+            ids = [item['id'] for item in data if isinstance(item, dict) and item.get('id')]
+            if ids:
+                database.set_news_last_id("finnhub", max(ids))
     except Exception as e:
         print(f"⚠️ Eroare Finnhub: {e}")
     
@@ -55,53 +134,296 @@ def fetch_finnhub_news():
 # ==========================================
 # FUNCȚIA 2: RSS FEEDS (XML)
 # ==========================================
+@lru_cache(maxsize=4096)
+def _parse_date_str(raw):
+    """
+    Data brută a unei surse -> PUB_DATE_FORMAT (UTC), sau None dacă nu o înțelegem.
+    Aceleași texte revin la fiecare scanare, așa că rezultatul e memorat.
+    """
+    raw = raw.strip()
+    try:
+        # ISO 8601 (Atom, dc:date): parserul C din datetime
+        dt_object = datetime.fromisoformat(raw)
+    except ValueError:
+        try:
+            # RFC 822 (pubDate din RSS 2.0)
+            dt_object = parsedate_to_datetime(raw)
+        except (TypeError, ValueError):
+            return None
+    if dt_object.tzinfo:
+        dt_object = dt_object.astimezone(timezone.utc)
+    return dt_object.strftime(PUB_DATE_FORMAT)
+
+
+def _entry_pub_date(entry):
+    """
+    Data publicării unei intrări RSS, în formatul PUB_DATE_FORMAT.
+    Întoarce (dată, exactă); exactă=False când nu am putut descifra data.
+    """
+    # feedparser are câmpurile secrete 'published_parsed' / 'updated_parsed'
+    # care conțin data deja descifrată (struct_time în UTC), indiferent de
+    # formatul sursei. O formatăm direct, fără mktime și fără obiect datetime.
+    parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+    if parsed:
+        return time.strftime(PUB_DATE_FORMAT, parsed), True
+
+    # PASUL 2: Data brută ('published' sau 'updated'), de ex. din parsarea rapidă;
+    # o normalizăm ca să nu ajungă în DB texte în formate diferite
+    raw = entry.get('published') or entry.get('updated')
+    if raw:
+        pub_date = _parse_date_str(raw)
+        if pub_date:
+            return pub_date, True
+        return raw, False
+
+    # PASUL 3: Dacă nu există nicio dată, punem data curentă (ultimul resort)
+    return datetime.now().strftime(PUB_DATE_FORMAT), False
+
+
+def _late_entry_cutoff(seen):
+    """Data sub care intrările unei surse sunt sigur vechi: cea mai nouă văzută minus o marjă."""
+    if not seen:
+        return ''
+    try:
+        cutoff = datetime.strptime(seen, PUB_DATE_FORMAT) - timedelta(hours=RSS_LATE_ENTRY_HOURS)
+    except ValueError:
+        return ''
+    return cutoff.strftime(PUB_DATE_FORMAT)
+
+
+def _record_feed_result(source_name, ok):
+    """Actualizează circuit breaker-ul unei surse după o încercare."""
+    if ok:
+        _feed_backoff.pop(source_name, None)
+        return
+    failures = _feed_backoff.get(source_name, (0, 0))[0] + 1
+    delay = min(RSS_RETRY_MAX_SECONDS, RSS_RETRY_BASE_SECONDS * 2 ** failures)
+    _feed_backoff[source_name] = (failures, time.time() + delay)
+
+
+def _feeds_due(feeds):
+    """Sursele care nu sunt în pauză după erori repetate."""
+    now = time.time()
+    return {
+        source_name: feed_url for source_name, feed_url in feeds.items()
+        if _feed_backoff.get(source_name, (0, 0))[1] <= now
+    }
+
+
+def _conditional_headers(state):
+    """Headere HTTP condiționale din (etag, last_modified) salvate la scanarea trecută."""
+    headers = {}
+    if state:
+        etag, last_modified = state
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+    return headers
+
+
+def _parse_rss_fast(content, limit):
+    """
+    Parsare rapidă pentru RSS 2.0: ElementTree citește doar primele `limit`
+    elemente <item> și se oprește, fără dicționarele grele ale feedparser.
+    Întoarce lista de intrări sau None dacă documentul nu e un RSS 2.0 simplu
+    (Atom, XML stricat, item fără titlu/link) -> atunci decide feedparser.
+    """
+    entries = []
+    try:
+        events = ET.iterparse(io.BytesIO(content), events=('start', 'end'))
+        _, root = next(events)
+        if root.tag != 'rss':
+            return None
+        for event, elem in events:
+            if event != 'end' or elem.tag != 'item':
+                continue
+            title = (elem.findtext('title') or '').strip()
+            link = (elem.findtext('link') or '').strip()
+            if not title or not link:
+                return None
+            entries.append({
+                'title': title,
+                'link': link,
+                'published': elem.findtext('pubDate') or elem.findtext(DC_DATE_TAG),
+            })
+            elem.clear()
+            if len(entries) >= limit:
+                break
+    except (ET.ParseError, StopIteration):
+        return None
+    return entries
+
+
+async def _read_capped(response, max_bytes):
+    """Citește corpul răspunsului pe bucăți și se oprește după max_bytes."""
+    chunks = []
+    size = 0
+    async for chunk in response.content.iter_chunked(64 * 1024):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= max_bytes:
+            # feedparser tolerează XML-ul tăiat: intrările de la început rămân valide
+            break
+    return b''.join(chunks)[:max_bytes]
+
+
+async def _fetch_feed(session, semaphore, source_name, feed_url, state=None):
+    """
+    Descarcă un flux RSS și îl parsează.
+    Întoarce (sursă, intrări, (etag, last_modified)); intrări e None la eroare sau
+    dacă serverul răspunde 304 (fluxul nu s-a schimbat de la ultima scanare).
+    """
+    try:
+        async with semaphore:
+            async with session.get(feed_url, headers=_conditional_headers(state)) as response:
+                if response.status == 304:
+                    _record_feed_result(source_name, True)
+                    print(f"   🔹 {source_name}: neschimbat.")
+                    return source_name, None, None
+                response.raise_for_status()
+                content = await _read_capped(response, RSS_MAX_BYTES)
+                headers = {'content-type': response.headers.get('Content-Type', '')}
+                validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+
+        entries = _parse_rss_fast(content, RSS_ENTRIES_PER_FEED)
+        if entries is None:
+            # Parsarea completă consumă CPU: o mutăm pe un thread ca să nu blocheze bucla
+            feed = await asyncio.to_thread(feedparser.parse, content, response_headers=headers)
+            entries = feed.entries[:RSS_ENTRIES_PER_FEED]
+        _record_feed_result(source_name, True)
+        return source_name, entries, validators
+    except Exception as e:
+        _record_feed_result(source_name, False)
+        print(f"⚠️ Eroare la RSS {source_name}: {e}")
+        return source_name, None, None
+
+
+async def _fetch_all_feeds(feeds, states):
+    """Descarcă toate fluxurile în paralel, pe o singură sesiune HTTP."""
+    semaphore = asyncio.Semaphore(RSS_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(total=RSS_TIMEOUT_SECONDS)
+    # Un singur pool de conexiuni keep-alive: fluxurile de pe același host
+    # refolosesc conexiunea TLS în loc să refacă handshake-ul
+    connector = aiohttp.TCPConnector(limit=RSS_CONCURRENCY, limit_per_host=RSS_CONCURRENCY_PER_HOST,
+                                     keepalive_timeout=30, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(timeout=timeout, headers=HTTP_HEADERS, connector=connector) as session:
+        return await asyncio.gather(*(
+            _fetch_feed(session, semaphore, source_name, feed_url, states.get(source_name))
+            for source_name, feed_url in feeds.items()
+        ))
+
+
+_serial_notice_shown = False
+
+
+def _fetch_all_feeds_serial(feeds, states):
+    """Varianta fără aiohttp: feedparser descarcă fluxurile unul câte unul."""
+    global _serial_notice_shown
+    if not _serial_notice_shown:
+        # O singură dată pe proces, nu la fiecare scanare
+        print("⚠️ aiohttp lipsește (pip install -r requirements.txt): fluxurile RSS se descarcă pe rând.")
+        _serial_notice_shown = True
+    results = []
+    for source_name, feed_url in feeds.items():
+        etag, last_modified = states.get(source_name) or (None, None)
+        try:
+            # feedparser este librăria specială care "citește" formatul RSS;
+            # știe singur să trimită If-None-Match / If-Modified-Since
+            feed = feedparser.parse(feed_url, etag=etag, modified=last_modified,
+                                    agent=HTTP_HEADERS['User-Agent'])
+            status = feed.get('status', 200)
+            if status >= 400:
+                raise RuntimeError(f"HTTP {status}")
+            _record_feed_result(source_name, True)
+            if status == 304:
+                print(f"   🔹 {source_name}: neschimbat.")
+                results.append((source_name, None, None))
+            else:
+                results.append((source_name, feed.entries[:RSS_ENTRIES_PER_FEED],
+                                (feed.get('etag'), feed.get('modified'))))
+        except Exception as e:
+            _record_feed_result(source_name, False)
+            print(f"⚠️ Eroare la RSS {source_name}: {e}")
+            results.append((source_name, None, None))
+    return results
+
+
 def fetch_rss_feeds():
     """Descarcă știri din toate sursele RSS definite în config."""
     print("📡 Conectare la fluxurile RSS...")
-    
-    total_rss_count = 0
-    
-    # .items() ne dă și numele sursei (Yahoo), și link-ul
-    for source_name, feed_url in config.RSS_FEEDS.items():
+
+    # ETag / Last-Modified de la scanarea trecută: fluxurile neschimbate răspund
+    # cu 304 și nu mai trimit (și nu mai parsăm) tot XML-ul
+    states = database.get_feed_states()
+    # Data celei mai noi știri văzute pe fiecare sursă: ce e mai vechi nu mai ajunge în DB
+    last_seen = database.get_feed_last_published()
+
+    # Sursele care au dat erori stau pe bară până le vine rândul la reîncercare
+    feeds = _feeds_due(config.RSS_FEEDS)
+    paused = len(config.RSS_FEEDS) - len(feeds)
+    if paused:
+        print(f"   ⏸️ {paused} surse în pauză după erori.")
+
+    # Întâi descărcăm și parsăm toate fluxurile, abia apoi scriem în baza de date
+    if AIOHTTP_AVAILABLE:
+        parsed_feeds = asyncio.run(_fetch_all_feeds(feeds, states))
+    else:
+        parsed_feeds = _fetch_all_feeds_serial(feeds, states)
+
+    # Adunăm toate știrile și le scriem într-o singură tranzacție
+    rows = []
+    newest = {}
+    failed = set()
+    for source_name, entries, _ in parsed_feeds:
+        if entries is None:
+            continue
+        cutoff = _late_entry_cutoff(last_seen.get(source_name))
+        source_rows = []
+        source_newest = ''
         try:
-            # feedparser este librăria specială care "citește" formatul RSS
-            feed = feedparser.parse(feed_url)
-            
-            local_count = 0
-            for entry in feed.entries[:5]: # Luăm doar primele 5 de la fiecare sursă
-                
-                # Unele RSS-uri au data în 'published', altele în 'updated'. Verificăm ambele.
-                # feedparser are un câmp secret numit 'published_parsed'
-                # care conține data deja descifrată, indiferent de formatul sursei.
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    # O convertim în formatul nostru curat: An-Luna-Zi Ora:Min:Sec
-                    dt_object = datetime.fromtimestamp(time.mktime(entry.published_parsed))
-                    pub_date = dt_object.strftime('%Y-%m-%d %H:%M:%S')
-                
-                # PASUL 2: Dacă nu merge conversia, luăm data brută trimisă de ei
-                # Căutăm câmpul 'published' sau 'updated'
-                elif entry.get('published') or entry.get('updated'):
-                    pub_date = entry.get('published', entry.get('updated'))
-                    
-                # PASUL 3: Dacă nu există nicio dată, punem data curentă (ultimul resort)
-                else:
-                    pub_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-                is_new = database.add_news_placeholder(
-                    source=source_name,
-                    title=entry.title,
-                    url=entry.link,
-                    published_at=pub_date
-                )
-                
-                if is_new:
-                    local_count += 1
-            
-            print(f"   🔹 {source_name}: {local_count} știri noi.")
-            total_rss_count += local_count
-            
+            for entry in entries:
+                pub_date, exact = _entry_pub_date(entry)
+                # Doar datele descifrate au formatul nostru și se pot compara
+                if exact:
+                    if pub_date <= cutoff:
+                        continue
+                    source_newest = max(source_newest, pub_date)
+                source_rows.append((source_name, entry['title'], entry['link'], pub_date))
         except Exception as e:
+            # Sursa e sărită cu totul, inclusiv știrile citite înainte de eroare
+            failed.add(source_name)
             print(f"⚠️ Eroare la RSS {source_name}: {e}")
+            continue
+        rows.extend(source_rows)
+        if source_newest:
+            newest[source_name] = source_newest
+
+    counts = database.add_news_placeholders(rows)
+    if counts is None:
+        # Tranzacția a eșuat: nicio sursă nu e salvată
+        counts = {}
+        committed = set()
+    else:
+        committed = {source_name for source_name, entries, _ in parsed_feeds if entries is not None} - failed
+    for source_name, entries, _ in parsed_feeds:
+        if entries is not None:
+            print(f"   🔹 {source_name}: {counts.get(source_name, 0)} știri noi.")
+
+    # Validatorii se salvează doar pentru sursele ale căror știri sunt în baza de date;
+    # altfel scanarea următoare primește 304 și știrile nesalvate se pierd
+    database.save_feed_states([
+        (source_name,) + validators
+        for source_name, _, validators in parsed_feeds
+        if source_name in committed and validators and any(validators)
+    ])
+    # La fel pentru data celei mai noi știri: altfel filtrul ar sări știrile nesalvate
+    database.save_feed_last_published([
+        (source_name, stamp) for source_name, stamp in newest.items() if source_name in committed
+    ])
+
+    total_rss_count = sum(counts.values())
+    return total_rss_count
 
 # ==========================================
 # MAIN (Punctul de pornire)
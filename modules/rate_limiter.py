@@ -22,13 +22,13 @@ class RateLimiter:
         self.lock = threading.Lock()
         # Initialize tokens for all configured sources with full capacity
         for source, config in self.limits.items():
-            self.tokens[source] = {'count': config['requests'], 'last_reset': time.time()}
+            self.tokens[source] = {'count': config['requests'], 'last_reset': time.monotonic()}
 
     def configure(self, source, requests, period):
         """Configure rate limit for a source."""
         self.limits[source] = {'requests': requests, 'period': period}
         with self.lock:
-            self.tokens[source] = {'count': requests, 'last_reset': time.time()}
+            self.tokens[source] = {'count': requests, 'last_reset': time.monotonic()}
 
     def _refill_tokens(self, source):
         """Refill tokens based on elapsed time."""
@@ -39,16 +39,16 @@ class RateLimiter:
 
         # Initialize tokens if not yet created
         if source not in self.tokens:
-            self.tokens[source] = {'count': limit['requests'], 'last_reset': time.time()}
+            self.tokens[source] = {'count': limit['requests'], 'last_reset': time.monotonic()}
             return
 
         token_info = self.tokens[source]
 
-        elapsed = time.time() - token_info['last_reset']
+        elapsed = time.monotonic() - token_info['last_reset']
         if elapsed >= limit['period']:
             # Full reset
             token_info['count'] = limit['requests']
-            token_info['last_reset'] = time.time()
+            token_info['last_reset'] = time.monotonic()
         else:
             # Partial refill (proportional)
             refill_rate = limit['requests'] / limit['period']
@@ -58,7 +58,7 @@ class RateLimiter:
                     token_info['count'] + new_tokens,
                     limit['requests']
                 )
-                token_info['last_reset'] = time.time()
+                token_info['last_reset'] = time.monotonic()
 
     def can_request(self, source):
         """Check if a request can be made without consuming a token."""
@@ -84,7 +84,7 @@ class RateLimiter:
         if source not in self.limits:
             return True  # No limit configured
 
-        start_time = time.time()
+        start_time = time.monotonic()
 
         while True:
             with self.lock:
@@ -96,7 +96,7 @@ class RateLimiter:
             if not blocking:
                 return False
 
-            if timeout and (time.time() - start_time) >= timeout:
+            if timeout and (time.monotonic() - start_time) >= timeout:
                 return False
 
             # Wait a bit before retrying
@@ -4,6 +4,8 @@ Combines sentiment from multiple sources into composite scores with consensus tr
 """
 
 import statistics
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from config import SENTIMENT_WEIGHTS
 import database
@@ -11,6 +13,27 @@ from modules.alphavantage_fetcher import fetch_ticker_sentiment
 from modules.stocktwits_fetcher import fetch_social_sentiment
 from modules.reddit_fetcher import fetch_ticker_velocity
 
+# source -> (fetch function, display name)
+_SOURCE_FETCHERS = {
+    'alphavantage': (fetch_ticker_sentiment, 'Alpha Vantage'),
+    'stocktwits': (fetch_social_sentiment, 'StockTwits'),
+    'reddit': (fetch_ticker_velocity, 'Reddit'),
+}
+
+
+def _score_to_direction(score):
+    """Convert composite score to 5-level direction."""
+    if score >= 0.6:
+        return 'strong_bullish'
+    elif score >= 0.2:
+        return 'bullish'
+    elif score > -0.2:
+        return 'neutral'
+    elif score > -0.6:
+        return 'bearish'
+    else:
+        return 'strong_bearish'
+
 
 class SentimentAggregator:
     """Aggregates sentiment from multiple sources with weighted scoring."""
@@ -24,39 +47,40 @@ class SentimentAggregator:
         """
         self.weights = weights or SENTIMENT_WEIGHTS
 
-    def fetch_all_sources(self, ticker):
+    def fetch_all_sources(self, ticker, sources=None):
         """
         Fetch sentiment from all available sources for a ticker.
 
         Args:
             ticker: Stock symbol
+            sources: Optional subset of source names to fetch (default: all)
 
         Returns:
             dict of {source: sentiment_data}
         """
         results = {}
+        fetchers = {
+            source: fetch for source, (fetch, _) in _SOURCE_FETCHERS.items()
+            if sources is None or source in sources
+        }
+        if not fetchers:
+            return results
+
+        # The sources are independent HTTP APIs: overlap the waits
+        with ThreadPoolExecutor(max_workers=len(fetchers)) as pool:
+            futures = {
+                source: pool.submit(fetch, ticker)
+                for source, fetch in fetchers.items()
+            }
 
-        # Fetch from each source (non-blocking to handle rate limits gracefully)
-        try:
-            av_result = fetch_ticker_sentiment(ticker)
-            if av_result:
-                results['alphavantage'] = av_result
-        except Exception as e:
-            print(f"Alpha Vantage fetch error for {ticker}: {e}")
-
-        try:
-            st_result = fetch_social_sentiment(ticker)
-            if st_result:
-                results['stocktwits'] = st_result
-        except Exception as e:
-            print(f"StockTwits fetch error for {ticker}: {e}")
-
-        try:
-            reddit_result = fetch_ticker_velocity(ticker)
-            if reddit_result:
-                results['reddit'] = reddit_result
-        except Exception as e:
-            print(f"Reddit fetch error for {ticker}: {e}")
+            # Collect in source order; one failing source doesn't affect the others
+            for source, future in futures.items():
+                try:
+                    result = future.result()
+                    if result:
+                        results[source] = result
+                except Exception as e:
+                    print(f"{_SOURCE_FETCHERS[source][1]} fetch error for {ticker}: {e}")
 
         return results
 
@@ -69,9 +93,9 @@ class SentimentAggregator:
             max_age_hours: Maximum age of cached data
 
         Returns:
-            dict of {source: sentiment_data} or None if stale
+            dict of {source: sentiment_data}, only sources with a fresh snapshot
         """
-        return database.get_latest_sentiment_by_source(ticker)
+        return database.get_latest_sentiment_by_source(ticker, max_age_hours=max_age_hours)
 
     def calculate_composite(self, ticker, use_cache=True, max_cache_age=1):
         """
@@ -88,8 +112,11 @@ class SentimentAggregator:
         # Get sentiment from sources
         if use_cache:
             sources = self.get_cached_sentiment(ticker, max_cache_age)
-            if not sources:
-                sources = self.fetch_all_sources(ticker)
+            # Refetch only the sources with no fresh snapshot, so one fresh
+            # source doesn't stand in for the whole composite
+            missing = [source for source in _SOURCE_FETCHERS if source not in sources]
+            if missing:
+                sources.update(self.fetch_all_sources(ticker, sources=missing))
         else:
             sources = self.fetch_all_sources(ticker)
 
@@ -166,8 +193,9 @@ class SentimentAggregator:
         if not sources:
             return None
 
-        # Collect scores and weights
-        weighted_scores = []
+        # Collect scores and weighted sums in one pass
+        scores = []
+        weighted_sum = 0
         total_weight = 0
         source_breakdown = {}
 
@@ -179,7 +207,8 @@ class SentimentAggregator:
             source_confidence = data.get('confidence', 0.5)
             adjusted_weight = weight * source_confidence
 
-            weighted_scores.append((score, adjusted_weight))
+            scores.append(score)
+            weighted_sum += score * adjusted_weight
             total_weight += adjusted_weight
 
             source_breakdown[source] = {
@@ -191,18 +220,17 @@ class SentimentAggregator:
 
         # Calculate weighted average
         if total_weight > 0:
-            composite_score = sum(s * w for s, w in weighted_scores) / total_weight
+            composite_score = weighted_sum / total_weight
         else:
-            composite_score = sum(s for s, w in weighted_scores) / len(weighted_scores)
+            composite_score = sum(scores) / len(scores)
 
         # Clamp to -1 to 1
         composite_score = max(-1.0, min(1.0, composite_score))
 
         # Calculate consensus strength (1 - standard deviation of scores)
-        scores_only = [s for s, w in weighted_scores]
-        if len(scores_only) >= 2:
+        if len(scores) >= 2:
             try:
-                stdev = statistics.stdev(scores_only)
+                stdev = statistics.stdev(scores)
                 consensus = max(0, 1 - stdev)
             except statistics.StatisticsError:
                 consensus = 1.0
@@ -246,16 +274,7 @@ class SentimentAggregator:
 
     def _score_to_direction(self, score):
         """Convert composite score to 5-level direction."""
-        if score >= 0.6:
-            return 'strong_bullish'
-        elif score >= 0.2:
-            return 'bullish'
-        elif score > -0.2:
-            return 'neutral'
-        elif score > -0.6:
-            return 'bearish'
-        else:
-            return 'strong_bearish'
+        return _score_to_direction(score)
 
     def _calculate_velocity(self, ticker):
         """
@@ -341,6 +360,9 @@ def aggregate_multiple_tickers(tickers, use_cache=True):
     aggregator = SentimentAggregator()
     results = {}
 
+    # Same symbol twice (or in different case) would hit every API twice
+    tickers = dict.fromkeys(t.upper() for t in tickers if t)
+
     for ticker in tickers:
         try:
             result = aggregator.calculate_composite(ticker, use_cache=use_cache)
@@ -369,26 +391,19 @@ def get_market_sentiment_summary():
     if not scores:
         return None
 
-    # Calculate distributions
-    strong_bullish = sum(1 for s in scores if s >= 0.6)
-    bullish = sum(1 for s in scores if 0.2 <= s < 0.6)
-    neutral = sum(1 for s in scores if -0.2 < s < 0.2)
-    bearish = sum(1 for s in scores if -0.6 < s <= -0.2)
-    strong_bearish = sum(1 for s in scores if s <= -0.6)
+    # Bucket every score in one pass (same bands as the composite direction)
+    distribution = Counter(_score_to_direction(s) for s in scores)
 
     total = len(scores)
-    bullish_ratio = (strong_bullish + bullish) / total if total > 0 else 0.5
+    bullish_ratio = (distribution['strong_bullish'] + distribution['bullish']) / total if total > 0 else 0.5
 
     return {
         'avg_sentiment': round(sum(scores) / len(scores), 4),
         'median_sentiment': round(statistics.median(scores), 4),
         'bullish_ratio': round(bullish_ratio, 4),
         'distribution': {
-            'strong_bullish': strong_bullish,
-            'bullish': bullish,
-            'neutral': neutral,
-            'bearish': bearish,
-            'strong_bearish': strong_bearish
+            direction: distribution[direction]
+            for direction in ('strong_bullish', 'bullish', 'neutral', 'bearish', 'strong_bearish')
         },
         'total_tickers': total
     }
@@ -1,8 +1,10 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright
 import time
 import random
+import threading
 
 # ==========================================
 # HEADER-E PENTRU DEGHIZARE
@@ -16,6 +18,21 @@ USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/119.0'
 ]
 
+# O sesiune HTTP pe fiecare thread de scanare: refolosim conexiunile TCP/TLS
+# când mai multe articole vin de pe același site (AP, Reuters, Yahoo...), dar
+# thread-urile nu împart între ele cookie-urile și pool-ul (Session nu e thread-safe)
+_local = threading.local()
+
+def _get_session():
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _local.session = session
+    return session
+
 def get_random_headers():
     return {
         'User-Agent': random.choice(USER_AGENTS),
@@ -30,7 +47,7 @@ def scrape_with_bs4(url):
     """Metoda rapidă. Descarcă HTML-ul static."""
     try:
         # Timeout de 10 secunde ca să nu blocăm programul dacă site-ul e picat
-        response = requests.get(url, headers=get_random_headers(), timeout=10)
+        response = _get_session().get(url, headers=get_random_headers(), timeout=10)
         
         # Dacă serverul zice "403 Forbidden", înseamnă că ne-a prins. Returnăm eșec.
         if response.status_code != 200:
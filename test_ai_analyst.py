@@ -0,0 +1,45 @@
+"""AI analyst: parsing the model's JSON reply and the analysis cache."""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from modules import ai_analyst
+from modules.ai_analyst import clean_json_response
+
+
+def test_clean_json_skips_chatty_preamble():
+    reply = 'Sigur {aici} e JSON-ul: {"summary": "Fed.", "impact_score": 8}'
+    assert clean_json_response(reply) == {'summary': 'Fed.', 'impact_score': 8}
+
+
+def test_clean_json_rejects_nested_fragment_of_broken_reply():
+    # The outer object is cut off; only the inner dict would decode
+    reply = '{"summary": "Fed.", "impact_score": 8, "meta": {"source": "x"}, "tickers": ['
+    assert clean_json_response(reply) is None
+
+
+class _SlowClient:
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def chat(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.2)
+        return {'message': {'content': json.dumps({'summary': 'Fed.', 'impact_score': 8})}}
+
+
+def test_duplicate_articles_in_one_wave_call_ollama_once(monkeypatch):
+    client = _SlowClient()
+    monkeypatch.setattr(ai_analyst, 'get_ollama_client', lambda: client)
+    monkeypatch.setattr(ai_analyst, '_analysis_cache', ai_analyst.OrderedDict())
+    text = 'The Fed held rates steady on Wednesday, citing cooling inflation. ' * 3
+
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(ai_analyst.analyze_article, [text] * 4))
+
+    assert client.calls == 1
+    assert all(r['impact_score'] == 8 for r in results)
+    assert ai_analyst._analysis_inflight == {}
@@ -0,0 +1,36 @@
+"""Database writers used by scan_news."""
+import sqlite3
+
+import pytest
+
+import database
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DB_NAME', str(tmp_path / 'news.db'))
+    database.init_db()
+
+
+def _analysis(url, summary):
+    return (url, 'body', summary, 7, True, ['AAPL'], 'Technology', 'bullish', 0.8, ['earnings'])
+
+
+def test_analysis_batch_does_not_recreate_deleted_news(temp_db):
+    database.add_news_placeholders([
+        ('Reuters', 'Kept', 'https://example.com/kept', '2025-10-13 01:00:00'),
+        ('Reuters', 'Reset', 'https://example.com/reset', '2025-10-13 02:00:00'),
+    ])
+    # /reset-db runs while the scan is still analysing
+    with sqlite3.connect(database.DB_NAME) as conn:
+        conn.execute("DELETE FROM news WHERE url = 'https://example.com/reset'")
+
+    updated = database.update_news_analysis_batch([
+        _analysis('https://example.com/kept', 'Kept summary'),
+        _analysis('https://example.com/reset', 'Reset summary'),
+    ])
+
+    assert updated == 1
+    with sqlite3.connect(database.DB_NAME) as conn:
+        rows = conn.execute("SELECT url, ai_summary, tickers FROM news").fetchall()
+    assert rows == [('https://example.com/kept', 'Kept summary', '["AAPL"]')]
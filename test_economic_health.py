@@ -0,0 +1,39 @@
+"""Economic health caching: recomputes must see rewritten FRED history."""
+from datetime import date, timedelta
+
+import pytest
+
+import database
+from modules.economic_health import EconomicHealthCalculator
+
+
+def _unrate_rows(values_by_date):
+    return [
+        {'series_id': 'UNRATE', 'indicator_name': 'Unemployment Rate', 'category': 'labor',
+         'value': value, 'observation_date': day.isoformat()}
+        for day, value in values_by_date
+    ]
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DB_NAME', str(tmp_path / 'news.db'))
+    database.init_db()
+
+
+def test_forced_recompute_sees_backfilled_history(temp_db):
+    today = date.today()
+    # 30 recent months below the latest reading -> UNRATE sits near the top
+    recent = [(today - timedelta(days=30 * i), 3.0 + i * 0.01) for i in range(1, 31)]
+    database.save_fred_indicators_bulk(_unrate_rows(recent + [(today, 5.0)]))
+
+    calculator = EconomicHealthCalculator()
+    before = calculator.calculate_health(force=True)['indicators']['UNRATE']['percentile']
+
+    # Backfill older, higher readings; the latest observation date is unchanged
+    older = [(today - timedelta(days=1000 + i), 9.0) for i in range(300)]
+    database.save_fred_indicators_bulk(_unrate_rows(older))
+
+    after = calculator.calculate_health(force=True)['indicators']['UNRATE']['percentile']
+    assert before > 90
+    assert after < 20
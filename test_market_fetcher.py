@@ -0,0 +1,77 @@
+"""Market fetcher: yfinance frames -> market_indices rows."""
+import math
+
+import pandas as pd
+
+from modules import market_fetcher
+from modules.market_fetcher import _download_frames, _frame_to_tuples, _is_rate_limited
+
+
+def _ohlcv(volume):
+    return pd.DataFrame({
+        'Open': [10.0, 11.0, 12.0],
+        'High': [10.5, 11.5, 12.5],
+        'Low': [9.5, 10.5, 11.5],
+        'Close': [10.0, 11.0, 12.0],
+        'Volume': volume,
+    }, index=pd.to_datetime(['2025-10-13', '2025-10-14', '2025-10-15']))
+
+
+def test_frame_to_tuples_truncates_fractional_and_missing_volume():
+    hist = _ohlcv([1.5, 2.0, math.nan])
+
+    rows = _frame_to_tuples(hist, prev_close=8.0)
+
+    assert [row[5] for row in rows] == [1, 2, None]
+    assert rows[0] == ('2025-10-13', 10.0, 10.5, 9.5, 10.0, 1, 25.0)
+
+
+class YFRateLimitError(Exception):
+    pass
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = type('Response', (), {'status_code': status_code})()
+
+
+class _FakeYF:
+    """yf.download drops '^DJI' (as yfinance does on a 429); its history call is rate limited once."""
+
+    def __init__(self):
+        self.history_calls = 0
+
+    def download(self, symbols, **kwargs):
+        good = [s for s in symbols if s != '^DJI']
+        return pd.concat({s: _ohlcv([100.0, 200.0, 300.0]) for s in good}, axis=1)
+
+    def Ticker(self, symbol):
+        fake = self
+
+        class _Ticker:
+            def history(self, **kwargs):
+                fake.history_calls += 1
+                if fake.history_calls == 1:
+                    raise YFRateLimitError("Too Many Requests. Rate limited.")
+                return _ohlcv([5.0, 6.0, 7.0])
+
+        return _Ticker()
+
+
+def test_download_frames_refetches_symbols_the_batch_dropped(monkeypatch):
+    monkeypatch.setattr(market_fetcher, 'YF_BACKOFF_SECONDS', 0)
+    yf = _FakeYF()
+
+    frames = _download_frames(yf, ['^GSPC', '^IXIC', '^DJI'], period='max')
+
+    assert sorted(frames) == ['^DJI', '^GSPC', '^IXIC']
+    assert frames['^DJI']['Volume'].tolist() == [5.0, 6.0, 7.0]
+    assert yf.history_calls == 2
+
+
+def test_rate_limit_detection_uses_type_or_status():
+    assert _is_rate_limited(YFRateLimitError("Too Many Requests"))
+    assert _is_rate_limited(_HTTPError(429))
+    assert not _is_rate_limited(_HTTPError(404))
+    assert not _is_rate_limited(ValueError("no data for 2025-04-29"))
@@ -0,0 +1,113 @@
+"""News fetcher: sync cursors only move once the news rows are committed."""
+import sqlite3
+
+import pytest
+
+import config
+import database
+from modules import news_fetcher
+
+
+class _FakeResponse:
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class _FakeSession:
+    def __init__(self, data):
+        self._data = data
+
+    def get(self, *args, **kwargs):
+        return _FakeResponse(self._data)
+
+
+FINNHUB_ITEMS = [
+    {'id': 107, 'source': 'Reuters', 'headline': 'Fed holds rates',
+     'url': 'https://example.com/fed', 'datetime': 1760000000},
+    {'id': 108, 'source': 'Reuters', 'headline': 'Oil rallies',
+     'url': 'https://example.com/oil', 'datetime': 1760000100},
+]
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DB_NAME', str(tmp_path / 'news.db'))
+    database.init_db()
+    database.set_news_last_id('finnhub', 100)
+
+
+@pytest.fixture
+def finnhub(monkeypatch):
+    monkeypatch.setattr(config, 'FINNHUB_TOKEN', 'test-token')
+    monkeypatch.setattr(news_fetcher, '_finnhub_session', _FakeSession(FINNHUB_ITEMS))
+
+
+def test_finnhub_cursor_advances_after_insert(temp_db, finnhub):
+    assert news_fetcher.fetch_finnhub_news() == 2
+    assert database.get_news_last_id('finnhub') == 108
+
+
+def test_finnhub_cursor_stays_put_when_insert_fails(temp_db, finnhub):
+    # Break the insert itself; the state table is untouched
+    with sqlite3.connect(database.DB_NAME) as conn:
+        conn.execute('DROP TABLE news')
+
+    assert news_fetcher.fetch_finnhub_news() == 0
+    assert database.get_news_last_id('finnhub') == 100
+
+
+def _rss_feeds(monkeypatch, parsed_feeds):
+    monkeypatch.setattr(config, 'RSS_FEEDS', {source: 'https://example.com/' + source
+                                              for source, _, _ in parsed_feeds})
+    monkeypatch.setattr(news_fetcher, 'AIOHTTP_AVAILABLE', False)
+    monkeypatch.setattr(news_fetcher, '_fetch_all_feeds_serial', lambda feeds, states: parsed_feeds)
+
+
+def _entry(n, link=True, day=13):
+    entry = {'title': f'Story {n}', 'published': f'Mon, {day} Oct 2025 0{n}:00:00 GMT'}
+    if link:
+        entry['link'] = f'https://example.com/story-{n}'
+    return entry
+
+
+def test_rss_state_kept_only_for_committed_sources(temp_db, monkeypatch):
+    _rss_feeds(monkeypatch, [
+        ('Good', [_entry(1), _entry(2)], ('"good-etag"', None)),
+        # An entry without a link aborts this source part-way through
+        ('Broken', [_entry(3), _entry(4, link=False)], ('"broken-etag"', None)),
+    ])
+
+    # Broken's first entry, read before the error, is not inserted either
+    assert news_fetcher.fetch_rss_feeds() == 2
+    assert database.get_feed_states() == {'Good': ('"good-etag"', None)}
+    assert database.get_feed_last_published() == {'Good': '2025-10-13 02:00:00'}
+
+
+def test_rss_state_not_saved_when_insert_fails(temp_db, monkeypatch):
+    _rss_feeds(monkeypatch, [('Good', [_entry(1)], ('"good-etag"', None))])
+    with sqlite3.connect(database.DB_NAME) as conn:
+        conn.execute('DROP TABLE news')
+
+    assert news_fetcher.fetch_rss_feeds() == 0
+    assert database.get_feed_states() == {}
+    assert database.get_feed_last_published() == {}
+
+
+def test_rss_keeps_late_entries_within_the_grace_window(temp_db, monkeypatch):
+    database.add_news_placeholders([('Good', 'Story 5', 'https://example.com/story-5',
+                                     '2025-10-13 05:00:00')])
+    database.save_feed_last_published([('Good', '2025-10-13 05:00:00')])
+    _rss_feeds(monkeypatch, [('Good', [
+        _entry(5),          # already stored: the unique url skips it
+        _entry(3),          # backdated but inside the window
+        _entry(1, day=12),  # a day older than anything seen
+    ], None)])
+
+    assert news_fetcher.fetch_rss_feeds() == 1
+    with sqlite3.connect(database.DB_NAME) as conn:
+        titles = [t for (t,) in conn.execute("SELECT title FROM news ORDER BY title")]
+    assert titles == ['Story 3', 'Story 5']
+    assert database.get_feed_last_published() == {'Good': '2025-10-13 05:00:00'}
@@ -0,0 +1,44 @@
+"""Sentiment aggregator: cached vs refetched sources."""
+import sqlite3
+
+import pytest
+
+import database
+from modules import sentiment_aggregator
+from modules.sentiment_aggregator import SentimentAggregator
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DB_NAME', str(tmp_path / 'news.db'))
+    database.init_db()
+
+
+@pytest.fixture
+def fetch_calls(monkeypatch):
+    calls = []
+
+    def fake_fetcher(source):
+        def fetch(ticker):
+            calls.append(source)
+            return {'ticker': ticker, 'source': source, 'sentiment_score': -0.5, 'confidence': 0.8}
+        return fetch
+
+    monkeypatch.setattr(sentiment_aggregator, '_SOURCE_FETCHERS', {
+        source: (fake_fetcher(source), name)
+        for source, (_, name) in sentiment_aggregator._SOURCE_FETCHERS.items()
+    })
+    return calls
+
+
+def test_composite_refetches_only_stale_sources(temp_db, fetch_calls):
+    database.save_sentiment_snapshot('AAPL', 'alphavantage', 0.7, confidence=0.9)
+    database.save_sentiment_snapshot('AAPL', 'reddit', 0.7, confidence=0.9)
+    with sqlite3.connect(database.DB_NAME) as conn:
+        conn.execute("UPDATE sentiment_snapshots SET timestamp = datetime('now', '-3 hours') "
+                     "WHERE source = 'reddit'")
+
+    result = SentimentAggregator().calculate_composite('AAPL', max_cache_age=1)
+
+    assert sorted(fetch_calls) == ['reddit', 'stocktwits']
+    assert set(result['source_breakdown']) >= {'alphavantage', 'reddit', 'stocktwits'}
@@ -0,0 +1,20 @@
+"""Web scraper: HTTP sessions are not shared between scan threads."""
+import threading
+
+from modules import web_scraper
+
+
+def test_each_thread_gets_its_own_session():
+    sessions = {}
+
+    def grab(name):
+        sessions[name] = web_scraper._get_session()
+
+    threads = [threading.Thread(target=grab, args=(n,)) for n in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sessions[0] is not sessions[1]
+    assert web_scraper._get_session() is web_scraper._get_session()